@@ -0,0 +1,198 @@
+"""
+Install pipeline benchmark on a synthetic skins repository.
+
+Runs the repo download (from a local HTTP server), a cold install, installed-state
+verification, an unchanged re-sync and the update reset path (reset, download of a
+changed repo, re-sync), reporting wall time, skins/s, MB/s, peak RSS and file-system
+operation counts for each phase.
+
+    python benchmarks/bench_install.py --scale medium --workers 4 --json results.json
+"""
+import argparse
+import functools
+import http.server
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import psutil
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Audit events counted as file-system operations ("open" covers every file opened for read or write).
+FS_EVENTS = ("open", "os.mkdir", "os.remove", "os.rmdir", "os.rename", "os.scandir", "os.listdir", "shutil.rmtree")
+
+class FsOpCounter:
+    """Counts FS_EVENTS through an audit hook; only counts while a phase is running."""
+
+    def __init__(self):
+        self.counts = dict.fromkeys(FS_EVENTS, 0)
+        self.active = False
+        sys.addaudithook(self._hook)
+
+    def _hook(self, event, args):
+        if self.active and event in self.counts:
+            self.counts[event] += 1
+
+    def start(self):
+        self.counts = dict.fromkeys(FS_EVENTS, 0)
+        self.active = True
+
+    def stop(self):
+        self.active = False
+        return {event: count for event, count in self.counts.items() if count}
+
+class RssSampler:
+    """Samples this process's RSS on a thread to get the peak within one phase."""
+
+    def __init__(self, interval=0.01):
+        self._process = psutil.Process()
+        self._interval = interval
+        self._stop = threading.Event()
+        self.peak = 0
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self._process.memory_info().rss)
+            self._stop.wait(self._interval)
+
+    def __enter__(self):
+        self.peak = self._process.memory_info().rss
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._process.memory_info().rss)
+
+def serve_directory(path):
+    handler = functools.partial(QuietHandler, directory=path)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+def installed_bytes(manifest):
+    return sum((record.get("fingerprint") or {}).get("bytes", 0) for record in manifest.values())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=("small", "medium", "full"), default="small", help="synthetic repo size")
+    parser.add_argument("--champions", type=int, help="override the number of champions")
+    parser.add_argument("--skins", type=int, help="override skins per champion")
+    parser.add_argument("--skin-bytes", type=int, help="override the size of each skin")
+    parser.add_argument("--stored-ratio", type=float, default=0.5, help="share of inner zips stored uncompressed")
+    parser.add_argument("--changed", type=float, default=0.1, help="share of skins changed for the update phase")
+    parser.add_argument("--chromas", action="store_true", help="install chromas too")
+    parser.add_argument("--dedup", action="store_true", help="install through the deduplicating blob store")
+    parser.add_argument("--layout", choices=("folder", "archive"), default="folder", help="installed skin layout")
+    parser.add_argument("--reader", choices=("file", "mmap"), default="file", help="repo zip reader")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--executor", choices=("thread", "process"), default="thread",
+                        help="file-system ops in process workers are not counted")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="lsm-bench-")
+    source_dir = tempfile.mkdtemp(prefix="lsm-bench-src-")
+    os.environ["LEAGUESKINMANAGERVN_DATA_DIR"] = data_dir
+    sys.path.insert(0, HERE)
+    sys.path.insert(0, os.path.join(os.path.dirname(HERE), "src"))
+
+    import config
+    import settings
+    import synthetic_repo
+    from logger import stop_logging
+    from skin_downloader import download_repo
+    from skin_installer import sync_skins
+    from skin_manifest import load_manifest
+    from fingerprint import verify_installed, installed_fingerprint
+    from update_checker import reset_skins_and_update_file
+
+    scale = dict(synthetic_repo.SCALES[args.scale])
+    overrides = {"champions": args.champions, "skins_per_champion": args.skins, "skin_bytes": args.skin_bytes}
+    scale.update({k: v for k, v in overrides.items() if v is not None})
+
+    config.ensure_dirs()
+    settings.load_settings()["dedup_store"] = args.dedup
+    settings.load_settings()["install_layout"] = args.layout
+    settings.load_settings()["repo_reader"] = args.reader
+    fs_ops = FsOpCounter()
+    results = {"scale": scale, "workers": args.workers, "executor": args.executor,
+               "dedup": args.dedup, "layout": args.layout, "reader": args.reader, "phases": {}}
+    repo_name = os.path.basename(config.REPO_ZIP_PATH)
+    server, base_url = serve_directory(source_dir)
+
+    def run_phase(name, func, skins=0, data_bytes=0):
+        fs_ops.start()
+        with RssSampler() as rss:
+            started = time.perf_counter()
+            value = func()
+            elapsed = max(time.perf_counter() - started, 1e-9)
+        ops = fs_ops.stop()
+        if callable(skins):
+            skins = skins(value)
+        if callable(data_bytes):
+            data_bytes = data_bytes(value)
+        phase = {
+            "seconds": round(elapsed, 4),
+            "skins": skins,
+            "skins_per_second": round(skins / elapsed, 1),
+            "mb_per_second": round(data_bytes / (1024 * 1024) / elapsed, 2),
+            "peak_rss_mb": round(rss.peak / (1024 * 1024), 1),
+            "fs_ops": ops,
+        }
+        results["phases"][name] = phase
+        print(f"{name:>15}: {elapsed:8.3f}s  {phase['skins_per_second']:>9} skins/s  "
+              f"{phase['mb_per_second']:>8} MB/s  rss {phase['peak_rss_mb']} MB  ops {sum(ops.values())}")
+        return value
+
+    try:
+        repo = synthetic_repo.make_repo(os.path.join(source_dir, repo_name), stored_ratio=args.stored_ratio, **scale)
+        results["repo_bytes"] = repo["bytes"]
+        url = f"{base_url}/{repo_name}"
+        skip_chromas = not args.chromas
+
+        def sync():
+            return sync_skins(repo["champions"], skip_chromas, workers=args.workers, executor=args.executor)
+
+        run_phase("download", lambda: download_repo(url), data_bytes=repo["bytes"])
+        run_phase("install_cold", sync, skins=lambda r: r[0],
+                  data_bytes=lambda r: installed_bytes(load_manifest()))
+
+        manifest = load_manifest()
+        run_phase("verify", lambda: (verify_installed(manifest, config.INSTALLED_DIR), installed_fingerprint(manifest)),
+                  skins=len(manifest), data_bytes=installed_bytes(manifest))
+        run_phase("sync_unchanged", sync, skins=lambda r: r[2])
+
+        changed = synthetic_repo.mutate_repo(repo["path"], repo["path"] + ".new", args.changed)
+        os.replace(repo["path"] + ".new", repo["path"])
+        results["changed_entries"] = changed
+
+        def update():
+            reset_skins_and_update_file(config.SKIN_REPO_COMMIT_FILE, "bench", "repo_commit")
+            download_repo(url)
+            return sync()
+
+        run_phase("update_reset", update, skins=lambda r: r[0], data_bytes=os.path.getsize(repo["path"]))
+
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+    finally:
+        server.shutdown()
+        stop_logging()
+        shutil.rmtree(data_dir, ignore_errors=True)
+        shutil.rmtree(source_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Install throughput with per-skin logging, per-champion summary logging and logging off.
+
+    python benchmarks/bench_logging.py --champions 40 --skins 15
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--champions", type=int, default=30)
+    parser.add_argument("--skins", type=int, default=10)
+    parser.add_argument("--skin-bytes", type=int, default=16 * 1024)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="lsm-bench-")
+    os.environ["LEAGUESKINMANAGERVN_DATA_DIR"] = data_dir
+    sys.path.insert(0, HERE)
+    sys.path.insert(0, os.path.join(os.path.dirname(HERE), "src"))
+
+    import config
+    import settings
+    import synthetic_repo
+    from logger import configure_logging, stop_logging
+    from skin_installer import install_champions
+
+    config.ensure_dirs()
+    try:
+        repo = synthetic_repo.make_repo(config.REPO_ZIP_PATH, args.champions, args.skins,
+                                        skin_bytes=args.skin_bytes)
+        results = {}
+        for mode in ("per_skin", "summary", "off"):
+            shutil.rmtree(config.INSTALLED_DIR, ignore_errors=True)
+            os.makedirs(config.INSTALLED_DIR)
+            settings.load_settings()["log_each_skin"] = mode == "per_skin"
+            logging.disable(logging.INFO if mode == "off" else logging.NOTSET)
+
+            started = time.perf_counter()
+            installed = install_champions(repo["champions"], True, workers=args.workers)
+            configure_logging()  # restarts the listener, so queued records are drained inside the timing
+            elapsed = time.perf_counter() - started
+
+            results[mode] = {"skins": installed, "seconds": round(elapsed, 3),
+                             "skins_per_second": round(installed / elapsed, 1)}
+            print(f"{mode:>9}: {installed} skins in {elapsed:.2f}s ({installed / elapsed:.0f} skins/s)")
+        logging.disable(logging.NOTSET)
+
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+    finally:
+        stop_logging()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
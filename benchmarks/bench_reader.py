@@ -0,0 +1,185 @@
+"""
+Repo zip reader benchmark: zipfile vs the indexed file reader vs the mmap reader.
+
+Every skin entry of the repo zip is opened as an inner zip and all of its members are
+read (or extracted with --extract), on --threads threads sharing the work. Each reader
+is run --rounds times in rotating order; the best round is reported with MB/s of outer
+entry bytes and the RSS growth during the round (for mmap this includes the mapped file
+pages, which the OS can drop at any time).
+
+    python benchmarks/bench_reader.py --size-gb 2 --threads 4
+    python benchmarks/bench_reader.py --repo path/to/lol-skins-main.zip
+"""
+import argparse
+import concurrent.futures
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+READERS = ("zipfile", "file", "mmap")
+READ_CHUNK = 1024 * 1024
+
+def drain_inner(skin_zip, dest):
+    """Read every member of an inner skin zip, or extract it below dest."""
+    if dest is not None:
+        skin_zip.extractall(dest)
+        return
+    for info in skin_zip.infolist():
+        with skin_zip.open(info) as member:
+            while member.read(READ_CHUNK):
+                pass
+
+def make_reader(kind, repo_path):
+    """Return (read_entry(entry, dest), close) for one reader kind."""
+    from repo_index import open_stored_entry, copy_entry
+    from mapped_zip import MappedZip
+
+    local = threading.local()
+    handles = []
+    lock = threading.Lock()
+
+    def per_thread(opener):
+        handle = getattr(local, "handle", None)
+        if handle is None:
+            handle = local.handle = opener()
+            with lock:
+                handles.append(handle)
+        return handle
+
+    if kind == "zipfile":
+        def read_entry(entry, dest):
+            outer = per_thread(lambda: zipfile.ZipFile(repo_path))
+            with outer.open(entry["name"]) as inner_file, zipfile.ZipFile(inner_file) as skin_zip:
+                drain_inner(skin_zip, dest)
+    else:
+        shared = MappedZip(repo_path) if kind == "mmap" else None
+
+        def read_entry(entry, dest):
+            repo_file = shared if shared is not None else per_thread(lambda: open(repo_path, 'rb'))
+            if entry["method"] == zipfile.ZIP_STORED:
+                with open_stored_entry(repo_file, entry) as inner_file, zipfile.ZipFile(inner_file) as skin_zip:
+                    drain_inner(skin_zip, dest)
+                return
+            with tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024) as spool:
+                copy_entry(repo_file, entry, spool)
+                spool.seek(0)
+                with zipfile.ZipFile(spool) as skin_zip:
+                    drain_inner(skin_zip, dest)
+
+        if shared is not None:
+            handles.append(shared)
+
+    def close():
+        for handle in handles:
+            handle.close()
+
+    return read_entry, close
+
+def run_round(kind, repo_path, entries, threads, extract_root):
+    import psutil
+
+    process = psutil.Process()
+    read_entry, close = make_reader(kind, repo_path)
+    dest_root = tempfile.mkdtemp(dir=extract_root) if extract_root else None
+    rss_before = process.memory_info().rss
+    peak = [rss_before]
+    stop = threading.Event()
+
+    def sample():
+        while not stop.wait(0.01):
+            peak[0] = max(peak[0], process.memory_info().rss)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    started = time.perf_counter()
+    try:
+        def job(i):
+            read_entry(entries[i], os.path.join(dest_root, str(i)) if dest_root else None)
+
+        if threads > 1:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as pool:
+                list(pool.map(job, range(len(entries))))
+        else:
+            for i in range(len(entries)):
+                job(i)
+        elapsed = time.perf_counter() - started
+    finally:
+        stop.set()
+        sampler.join()
+        close()
+        if dest_root:
+            shutil.rmtree(dest_root, ignore_errors=True)
+    return elapsed, max(peak[0] - rss_before, 0)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repo", help="existing repo zip to read (default: generate a synthetic one)")
+    parser.add_argument("--size-gb", type=float, default=2.0, help="uncompressed skin data in the generated repo")
+    parser.add_argument("--skin-bytes", type=int, default=4 * 1024 * 1024, help="size of each generated skin")
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--readers", default=",".join(READERS), help="comma separated subset of " + ", ".join(READERS))
+    parser.add_argument("--extract", action="store_true", help="extract inner zips to a temp dir instead of only reading them")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="lsm-bench-reader-")
+    os.environ["LEAGUESKINMANAGERVN_DATA_DIR"] = data_dir
+    sys.path.insert(0, HERE)
+    sys.path.insert(0, os.path.join(os.path.dirname(HERE), "src"))
+
+    import synthetic_repo
+    from logger import stop_logging
+    from repo_index import build_repo_index
+
+    readers = [r for r in args.readers.split(",") if r in READERS]
+    try:
+        repo_path = args.repo
+        if repo_path is None:
+            repo_path = os.path.join(data_dir, "lol-skins-main.zip")
+            skins_total = max(1, int(args.size_gb * 1024 ** 3 // args.skin_bytes))
+            champions = max(1, skins_total // 12)
+            print(f"Generating {champions * 12} skins of {args.skin_bytes // 1024} KiB ...")
+            synthetic_repo.make_repo(repo_path, champions=champions, skins_per_champion=12,
+                                     chromas_per_champion=0, skin_bytes=args.skin_bytes, files_per_skin=4)
+
+        entries = [entry for champion in build_repo_index(repo_path).values() for entry in champion]
+        entry_bytes = sum(entry["csize"] for entry in entries)
+        results = {"repo_bytes": os.path.getsize(repo_path), "entries": len(entries), "threads": args.threads,
+                   "extract": args.extract, "readers": {}}
+        print(f"{len(entries)} entries, {entry_bytes / 1024 ** 3:.2f} GiB, {args.threads} thread(s)")
+
+        best = {}
+        for round_no in range(args.rounds):
+            order = readers[round_no % len(readers):] + readers[:round_no % len(readers)]
+            for kind in order:
+                elapsed, rss = run_round(kind, repo_path, entries, args.threads,
+                                         data_dir if args.extract else None)
+                if kind not in best or elapsed < best[kind][0]:
+                    best[kind] = (elapsed, rss)
+
+        for kind in readers:
+            elapsed, rss = best[kind]
+            results["readers"][kind] = {
+                "seconds": round(elapsed, 4),
+                "mb_per_second": round(entry_bytes / (1024 * 1024) / elapsed, 1),
+                "rss_growth_mb": round(rss / (1024 * 1024), 1),
+            }
+            print(f"{kind:>8}: {elapsed:8.3f}s  {entry_bytes / (1024 * 1024) / elapsed:8.1f} MB/s  "
+                  f"rss +{rss / (1024 * 1024):.1f} MB")
+
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+    finally:
+        stop_logging()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Generate synthetic lol-skins-main.zip archives with the real repository layout.
+
+    python benchmarks/synthetic_repo.py out.zip --scale full
+"""
+import io
+import os
+import random
+import argparse
+import zipfile
+
+REPO_ROOT = "lol-skins-main"
+
+# Roughly the real repository at "full": ~170 champions with ~10 skins and a few chromas each.
+SCALES = {
+    "small": {"champions": 10, "skins_per_champion": 5, "chromas_per_champion": 2, "skin_bytes": 32 * 1024},
+    "medium": {"champions": 50, "skins_per_champion": 10, "chromas_per_champion": 3, "skin_bytes": 64 * 1024},
+    "full": {"champions": 170, "skins_per_champion": 12, "chromas_per_champion": 5, "skin_bytes": 256 * 1024},
+}
+
+def make_skin_zip(rng, skin_bytes, files_per_skin):
+    """Inner skin archive: META/info.json plus WAD files of half random, half repetitive data."""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as skin:
+        skin.writestr("META/info.json", '{"Name": "Synthetic", "Version": "1.0"}')
+        per_file = max(1, skin_bytes // max(1, files_per_skin))
+        for i in range(files_per_skin):
+            data = rng.randbytes(per_file // 2) if hasattr(rng, "randbytes") else os.urandom(per_file // 2)
+            skin.writestr(f"WAD/part{i}.wad.client", data + b"\0" * (per_file - len(data)))
+    return buf.getvalue()
+
+def make_repo(path, champions=20, skins_per_champion=10, chromas_per_champion=3,
+              skin_bytes=64 * 1024, files_per_skin=2, stored_ratio=0.5, seed=1):
+    """
+    Write a synthetic repo zip to path with skins/<Champion>/<Skin>.zip entries and
+    skins/<Champion>/<Skin> chromas.zip entries (the layout repo_index reads chromas from).
+    stored_ratio of the inner skin zips are stored uncompressed in the outer archive, the
+    rest are deflated.
+    Returns a summary dict.
+    """
+    rng = random.Random(seed)
+    skins = 0
+    chromas = 0
+    with zipfile.ZipFile(path, 'w') as repo:
+        repo.writestr(f"{REPO_ROOT}/README.md", "synthetic")
+        for c in range(champions):
+            champion = f"Champion{c:03d}"
+            for s in range(skins_per_champion):
+                method = zipfile.ZIP_STORED if rng.random() < stored_ratio else zipfile.ZIP_DEFLATED
+                repo.writestr(f"{REPO_ROOT}/skins/{champion}/{champion} Skin {s}.zip",
+                              make_skin_zip(rng, skin_bytes, files_per_skin), compress_type=method)
+                skins += 1
+            for k in range(chromas_per_champion):
+                repo.writestr(f"{REPO_ROOT}/skins/{champion}/{champion} Skin {k} chromas.zip",
+                              make_skin_zip(rng, skin_bytes // 4, 1), compress_type=zipfile.ZIP_DEFLATED)
+                chromas += 1
+    return {
+        "path": path,
+        "champions": [f"Champion{c:03d}" for c in range(champions)],
+        "skins": skins,
+        "chromas": chromas,
+        "bytes": os.path.getsize(path),
+    }
+
+def mutate_repo(src, dest, changed_ratio=0.1, seed=2):
+    """
+    Copy the repo zip at src to dest with changed_ratio of the skin zips regenerated,
+    as a new upstream commit would. Returns the number of changed entries.
+    """
+    rng = random.Random(seed)
+    changed = 0
+    with zipfile.ZipFile(src) as old, zipfile.ZipFile(dest, 'w') as new:
+        for info in old.infolist():
+            data = old.read(info)
+            if info.filename.endswith(".zip") and rng.random() < changed_ratio:
+                data = make_skin_zip(rng, max(1024, info.file_size), 2)
+                changed += 1
+            new.writestr(info, data, compress_type=info.compress_type)
+    return changed
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic skins repository zip.")
+    parser.add_argument("path")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    repo = make_repo(args.path, seed=args.seed, **SCALES[args.scale])
+    print(f"{repo['path']}: {repo['skins']} skins, {repo['bytes'] / (1024 * 1024):.1f} MiB")
+
+if __name__ == "__main__":
+    main()
@@ -21,6 +21,26 @@ COMMON_ARGS = [
     '--hidden-import=champions',
     '--hidden-import=skin_downloader',
     '--hidden-import=skin_installer',
+    '--hidden-import=repo_index',
+    '--hidden-import=settings',
+    '--hidden-import=skin_manifest',
+    '--hidden-import=metadata_client',
+    '--hidden-import=http_session',
+    '--hidden-import=pipeline',
+    '--hidden-import=fingerprint',
+    '--hidden-import=process_watch',
+    '--hidden-import=tray_state',
+    '--hidden-import=startup_report',
+    '--hidden-import=staging',
+    '--hidden-import=install_scope',
+    '--hidden-import=metrics',
+    '--hidden-import=blob_store',
+    '--hidden-import=skin_archive',
+    '--hidden-import=manager_diff',
+    '--hidden-import=remote_zip',
+    '--hidden-import=repo_patch',
+    '--hidden-import=mapped_zip',
+    '--hidden-import=trash',
     '--hidden-import=update_checker',
 ]
 
@@ -0,0 +1,205 @@
+import os
+import uuid
+import shutil
+import hashlib
+import threading
+from config import BLOB_STORE_DIR
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+def member_path(root, info):
+    """Safe destination of a zip member below root (same sanitising as ZipFile.extract)."""
+    arcname = os.path.splitdrive(info.filename.replace('\\', '/'))[1]
+    parts = [p for p in arcname.split('/') if p not in ('', '.', '..')]
+    return os.path.join(root, *parts) if parts else root
+
+class BlobStore:
+    """
+    Content-addressed store of extracted skin files, hard linked into each skin folder.
+    Blobs live at <root>/<crc32>-<size>/<sha256>: the CRC32 and size from the zip
+    directory pick the bucket without reading any data, and a member only has to be
+    hashed when its bucket already exists. Destinations on a volume where the store
+    cannot hard link (FAT/exFAT, another drive) are extracted without the store.
+    """
+
+    def __init__(self, root=BLOB_STORE_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self._links_supported = True
+        self._volumes = {}
+        self.stats = {"files": 0, "linked": 0, "bytes_saved": 0, "bytes_written": 0, "copies": 0}
+
+    def _count(self, **values):
+        with self._lock:
+            for name, value in values.items():
+                self.stats[name] += value
+
+    def _bucket(self, info):
+        return os.path.join(self.root, f"{info.CRC:08x}-{info.file_size}")
+
+    def _hash_member(self, archive, info):
+        digest = hashlib.sha256()
+        with archive.open(info) as src:
+            for chunk in iter(lambda: src.read(COPY_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _write_blob(self, archive, info, bucket):
+        """Extract the member into the bucket under its SHA-256; returns the blob path."""
+        os.makedirs(bucket, exist_ok=True)
+        tmp_path = os.path.join(bucket, f".tmp-{uuid.uuid4().hex}")
+        digest = hashlib.sha256()
+        try:
+            with archive.open(info) as src, open(tmp_path, 'wb') as dst:
+                for chunk in iter(lambda: src.read(COPY_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    dst.write(chunk)
+            blob_path = os.path.join(bucket, digest.hexdigest())
+            # Linking never replaces a blob another worker stored (and linked) first; rename
+            # could on POSIX. Without hard links the rename keeps whichever copy came first.
+            try:
+                os.link(tmp_path, blob_path)
+            except FileExistsError:
+                pass
+            except OSError:
+                try:
+                    os.rename(tmp_path, blob_path)
+                except FileExistsError:
+                    pass
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return blob_path
+
+    def _link(self, blob_path, target):
+        if os.path.lexists(target):
+            os.remove(target)
+        if self._links_supported:
+            try:
+                os.link(blob_path, target)
+                return True
+            except OSError as e:
+                if not os.path.exists(blob_path):
+                    raise
+                # Link count limits are per blob; anything else means the volume has no hard links.
+                if getattr(e, "winerror", None) != 1142 and e.errno != getattr(os, "EMLINK", None):
+                    logger.warning("Hard links unavailable in %s (%s); copying files instead", self.root, e)
+                    self._links_supported = False
+        shutil.copyfile(blob_path, target)
+        self._count(copies=1)
+        return False
+
+    def can_link(self, dest):
+        """Whether files in the store can be hard linked below dest; probed once per volume."""
+        probe_dir = dest
+        while not os.path.isdir(probe_dir) and os.path.dirname(probe_dir) != probe_dir:
+            probe_dir = os.path.dirname(probe_dir)
+        os.makedirs(self.root, exist_ok=True)
+        key = os.stat(probe_dir).st_dev
+        with self._lock:
+            supported = self._volumes.get(key)
+        if supported is not None:
+            return supported
+
+        name = f".link-probe-{uuid.uuid4().hex}"
+        source = os.path.join(self.root, name)
+        link = os.path.join(probe_dir, name)
+        try:
+            open(source, 'wb').close()
+            os.link(source, link)
+            supported = True
+        except OSError as e:
+            logger.warning("Hard links from %s to %s unavailable (%s); extracting there without the store",
+                           self.root, probe_dir, e)
+            supported = False
+        finally:
+            for path in (link, source):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        with self._lock:
+            self._volumes[key] = supported
+        return supported
+
+    def place(self, archive, info, target):
+        """Put one member at target through the store; returns the bytes not written thanks to dedup."""
+        bucket = self._bucket(info)
+        blob_path = None
+        if os.path.isdir(bucket):
+            candidate = os.path.join(bucket, self._hash_member(archive, info))
+            if os.path.exists(candidate):
+                blob_path = candidate
+        saved = 0
+        if blob_path is None:
+            blob_path = self._write_blob(archive, info, bucket)
+            self._count(bytes_written=info.file_size)
+        else:
+            saved = info.file_size
+        linked = self._link(blob_path, target)
+        self._count(files=1, linked=int(linked and saved > 0), bytes_saved=saved if linked else 0)
+        return saved if linked else 0
+
+    def extract_all(self, archive, dest):
+        """extractall() replacement that stores every file once; returns the bytes saved."""
+        if not self.can_link(dest):
+            # Storing and then copying would write every file twice.
+            archive.extractall(dest)
+            return 0
+        saved = 0
+        for info in archive.infolist():
+            target = member_path(dest, info)
+            if info.is_dir():
+                os.makedirs(target, exist_ok=True)
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            saved += self.place(archive, info, target)
+        return saved
+
+    def collect_garbage(self):
+        """Delete blobs no skin links to any more (link count 1) and empty buckets; returns bytes freed."""
+        freed = 0
+        removed = 0
+        if not os.path.isdir(self.root):
+            return 0
+        with os.scandir(self.root) as buckets:
+            for bucket in buckets:
+                if not bucket.is_dir(follow_symlinks=False):
+                    continue
+                remaining = 0
+                with os.scandir(bucket.path) as blobs:
+                    for blob in blobs:
+                        try:
+                            # DirEntry.stat() reports st_nlink as 0 on Windows, so stat the path.
+                            st = os.stat(blob.path, follow_symlinks=False)
+                            if st.st_nlink <= 1:
+                                os.remove(blob.path)
+                                freed += st.st_size
+                                removed += 1
+                            else:
+                                remaining += 1
+                        except OSError as e:
+                            remaining += 1
+                            logger.error("Failed to collect blob %s: %s", blob.path, e)
+                if not remaining:
+                    try:
+                        os.rmdir(bucket.path)
+                    except OSError:
+                        pass
+        if removed:
+            logger.info("Blob store: removed %d unreferenced blobs (%.1f MiB)", removed, freed / (1024 * 1024))
+        return freed
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """Process-wide store (each process pool worker gets its own instance over the same folder)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = BlobStore()
+        return _store
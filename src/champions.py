@@ -1,31 +1,141 @@
+import os
+import re
+import threading
 import requests
-from config import LOL_VERSION_URL, CHAMPION_DATA_URL
+import psutil
+import http_session
+from config import CHAMPION_DATA_URL
 from update_checker import get_latest_lol_version
+from metadata_client import get_json
+from settings import get_setting
 from logger import setup_logger
 
 logger = setup_logger(__name__)
 
-def get_current_champion():
-    """Get current in-game champion from local API"""
-    url = "https://127.0.0.1:2999/liveclientdata/playerlist"
+CHAMPION_DATA_TTL = 24 * 60 * 60
+LCU_PROCESS = "LeagueClientUx.exe"
+
+def _get_champion_data():
+    version = get_latest_lol_version()
+    # champion.json never changes for a given version, so the cached copy is reused freely.
+    return get_json(CHAMPION_DATA_URL.format(version=version), ttl=CHAMPION_DATA_TTL)
+
+def get_current_champion(base_url=None):
+    """Get the active player's champion from the in-game live client API"""
+    base_url = (base_url or get_setting("live_client_url")).rstrip("/")
     try:
-        response = requests.get(url, verify=False, timeout=3)
-        if response.status_code == 200:
-            return response.json()[0]['championName']
+        response = http_session.get(f"{base_url}/liveclientdata/activeplayername", verify=False, timeout=3)
+        if response.status_code != 200:
+            return None
+        active_name = response.json()
+        response = http_session.get(f"{base_url}/liveclientdata/playerlist", verify=False, timeout=3)
+        if response.status_code != 200:
+            return None
+        for player in response.json():
+            if active_name in (player.get("riotId"), player.get("summonerName")):
+                return player.get("championName")
+        logger.warning("Active player %r not found in live client player list", active_name)
     except (requests.ConnectionError, requests.Timeout):
-        logger.info("No active game detected")
+        logger.debug("No active game detected")
     except Exception as e:
         logger.error(f"Champion detection failed: {e}")
     return None
 
+# (pid, base_url, auth) of the client the API credentials were read from; they hold until it exits.
+_lcu = None
+_lcu_lock = threading.Lock()
+
+def _read_lockfile(pid):
+    """(base_url, auth) from the lockfile the client with this pid keeps next to its executable, or None."""
+    try:
+        path = os.path.join(os.path.dirname(psutil.Process(pid).exe()), "lockfile")
+        with open(path, 'r', encoding='utf-8') as f:
+            _, _, port, password, protocol = f.read().strip().split(":")
+        return f"{protocol}://127.0.0.1:{port}", ("riot", password)
+    except (OSError, ValueError, psutil.Error):
+        return None
+
+def _scan_lcu_process():
+    """(pid, base_url, auth) from the running LeagueClientUx command line, or None."""
+    for proc in psutil.process_iter(["name", "cmdline"]):
+        if (proc.info.get("name") or "").lower() != LCU_PROCESS.lower():
+            continue
+        cmdline = " ".join(proc.info.get("cmdline") or ())
+        port = re.search(r"--app-port=(\d+)", cmdline)
+        token = re.search(r"--remoting-auth-token=([\w-]+)", cmdline)
+        if port and token:
+            return proc.pid, f"https://127.0.0.1:{port.group(1)}", ("riot", token.group(1))
+    return None
+
+def get_lcu_connection(client_pids=()):
+    """
+    Base URL and auth for the League Client API: the lcu_url setting if set (no auth),
+    otherwise the port and token of the running client, read once per client process from
+    the lockfile of one of client_pids (LeagueClient PIDs) or the LeagueClientUx command line.
+    """
+    global _lcu
+    lcu_url = get_setting("lcu_url")
+    if lcu_url:
+        return lcu_url.rstrip("/"), None
+    with _lcu_lock:
+        if _lcu is not None and psutil.pid_exists(_lcu[0]):
+            return _lcu[1], _lcu[2]
+        _lcu = None
+        for pid in client_pids:
+            connection = _read_lockfile(pid)
+            if connection is not None:
+                _lcu = (pid,) + connection
+                break
+        else:
+            _lcu = _scan_lcu_process()
+        return (_lcu[1], _lcu[2]) if _lcu is not None else (None, None)
+
+def reset_lcu_connection():
+    """Forget the cached client API credentials so the next call reads them again."""
+    global _lcu
+    with _lcu_lock:
+        _lcu = None
+
+def get_champ_select_champion(client_pids=()):
+    """Get the champion the local player has picked or is hovering in champ select"""
+    base_url, auth = get_lcu_connection(client_pids)
+    if base_url is None:
+        return None
+    try:
+        response = http_session.get(f"{base_url}/lol-champ-select/v1/session", auth=auth, verify=False, timeout=3)
+        if response.status_code == 401:
+            # The client restarted with a new token (or the lockfile was stale).
+            reset_lcu_connection()
+            return None
+        if response.status_code != 200:
+            return None
+        session = response.json()
+        for member in session.get("myTeam", []):
+            if member.get("cellId") == session.get("localPlayerCellId"):
+                champion_id = member.get("championId") or member.get("championPickIntent")
+                return get_champion_name_by_id(champion_id) if champion_id else None
+    except requests.ConnectionError:
+        reset_lcu_connection()
+        logger.debug("League client API not reachable")
+    except requests.Timeout:
+        logger.debug("League client API not reachable")
+    except Exception as e:
+        logger.error(f"Champ select detection failed: {e}")
+    return None
+
+def get_champion_name_by_id(champion_id):
+    try:
+        for champ in _get_champion_data()["data"].values():
+            if champ["key"] == str(champion_id):
+                return champ["name"]
+    except Exception as e:
+        logger.error(f"Champion lookup failed: {e}")
+    return None
+
 def get_champion_names():
     """Fetch all champion names from Riot API"""
     try:
-        version = get_latest_lol_version()
-        champion_data = requests.get(
-            CHAMPION_DATA_URL.format(version=version),
-            timeout=5
-        ).json()
+        champion_data = _get_champion_data()
         return [champ["name"] for champ in champion_data["data"].values()]
     except Exception as e:
         logger.error(f"Champion list fetch failed: {e}")
@@ -9,28 +9,48 @@ else:
 APPDATA = os.environ.get('APPDATA') if sys.platform == 'win32' else os.path.join(PROJECT_ROOT, 'data')
 APP_NAME = "LeagueSkinManagerVN"
 UNINSTALL_APP_NAME = "LeagueSkinManagerVNUninstall"
-DATA_DIR = os.path.join(APPDATA, APP_NAME)
+# LEAGUESKINMANAGERVN_DATA_DIR points all data at another folder (used by the benchmarks).
+DATA_DIR = os.environ.get("LEAGUESKINMANAGERVN_DATA_DIR") or os.path.join(APPDATA, APP_NAME)
 
 DOWNLOAD_DIR = os.path.join(DATA_DIR, "skins")
 INSTALL_DIR = os.path.join(DATA_DIR, "cslol-manager")
 INSTALLED_DIR = os.path.join(INSTALL_DIR, "installed")
+INSTALLED_STAGING_DIR = os.path.join(INSTALL_DIR, "installed.staging")
+BLOB_STORE_DIR = os.path.join(INSTALL_DIR, "blobs")
+ARCHIVE_DIR = os.path.join(INSTALL_DIR, "archives")
+MANAGER_STAGING_DIR = os.path.join(DATA_DIR, "cslol-manager.staging")
+MANAGER_DOWNLOAD_DIR = os.path.join(DATA_DIR, "manager_update")
 LOG_DIR = os.path.join(DATA_DIR, "logs")
 PROFILES_DIR = os.path.join(INSTALL_DIR, "profiles")
+HTTP_CACHE_DIR = os.path.join(DATA_DIR, "http_cache")
 
 PROFILE_FILE = os.path.join(INSTALLED_DIR, "default_profile.txt")
 LOL_VERSION_FILE = os.path.join(DATA_DIR, "lol_version.txt")
 VERSION_FILE = os.path.join(INSTALL_DIR, "version.txt")
 REPO_ZIP_PATH = os.path.join(DOWNLOAD_DIR, "lol-skins-main.zip")
+REPO_INDEX_PATH = os.path.join(DOWNLOAD_DIR, "lol-skins-main.index.json")
+REMOTE_INDEX_PATH = os.path.join(DOWNLOAD_DIR, "lol-skins-main.remote-index.json")
+REPO_PATCH_DIR = os.path.join(DOWNLOAD_DIR, "patch")
+REPO_PATCH_STATE_FILE = os.path.join(DOWNLOAD_DIR, "lol-skins-main.patch.json")
+# Folders queued for deletion by the background purge (same volume, so trashing is one rename).
+TRASH_DIR = os.path.join(DATA_DIR, "trash")
 SKIN_REPO_COMMIT_FILE = os.path.join(DATA_DIR, "skin_repo_commit_hash.txt")
 INSTALLED_HASH_FILE = os.path.join(DATA_DIR, "installed_hash.txt")
+SETTINGS_FILE = os.path.join(DATA_DIR, "settings.json")
+INSTALLED_MANIFEST_FILE = os.path.join(DATA_DIR, "installed_manifest.json")
+INSTALL_JOURNAL_FILE = os.path.join(DATA_DIR, "install_journal.jsonl")
+MANAGER_UPDATE_JOURNAL_FILE = os.path.join(DATA_DIR, "manager_update_journal.json")
+MANAGER_MANIFEST_FILE = os.path.join(DATA_DIR, "manager_manifest.json")
 
 LOL_VERSION_URL = "https://ddragon.leagueoflegends.com/api/versions.json"
 CHAMPION_DATA_URL = "https://ddragon.leagueoflegends.com/cdn/{version}/data/en_US/champion.json"
 GITHUB_RELEASES_URL = "https://api.github.com/repos/LeagueToolkit/cslol-manager/releases/latest"
 SKINS_REPO_URL = "https://github.com/darkseal-org/lol-skins/archive/refs/heads/main.zip"
 SKINS_REPO_COMMIT_URL = "https://api.github.com/repos/darkseal-org/lol-skins/commits/main"  
+SKINS_REPO_COMPARE_URL = "https://api.github.com/repos/darkseal-org/lol-skins/compare/{base}...{head}"
+SKINS_REPO_RAW_URL = "https://raw.githubusercontent.com/darkseal-org/lol-skins/{sha}/{path}"
 
-os.makedirs(DOWNLOAD_DIR, exist_ok=True)
-os.makedirs(INSTALL_DIR, exist_ok=True)
-os.makedirs(INSTALLED_DIR, exist_ok=True)
-os.makedirs(LOG_DIR, exist_ok=True)
+def ensure_dirs():
+    """Create the data folders; called once the app has decided to run, not at import."""
+    for d in (DOWNLOAD_DIR, INSTALL_DIR, INSTALLED_DIR, LOG_DIR):
+        os.makedirs(d, exist_ok=True)
@@ -0,0 +1,71 @@
+import os
+import zlib
+import concurrent.futures
+from skin_archive import LAYOUT_ARCHIVE, archive_fingerprint
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+VERIFY_WORKERS = 8
+
+def scan_skin_dir(path):
+    """
+    Cheap fingerprint of an installed skin folder: file count, total size and newest mtime.
+    Uses os.scandir so the stat data comes from the directory listing where the OS
+    provides it. Returns None if the folder does not exist.
+    """
+    files = 0
+    total_bytes = 0
+    newest = 0
+    stack = [path]
+    try:
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        st = entry.stat(follow_symlinks=False)
+                        files += 1
+                        total_bytes += st.st_size
+                        newest = max(newest, st.st_mtime_ns)
+    except FileNotFoundError:
+        return None
+    return {"files": files, "bytes": total_bytes, "mtime": newest}
+
+def _check_skin(installed_dir, skin_name, record):
+    expected = record.get("fingerprint")
+    if not expected:
+        return "no fingerprint"
+    if record.get("layout") == LAYOUT_ARCHIVE:
+        # The folder only holds META/ until the skin is expanded; the archive is what was installed.
+        if not os.path.isdir(os.path.join(installed_dir, skin_name)):
+            return "missing"
+        actual = archive_fingerprint(skin_name)
+    else:
+        actual = scan_skin_dir(os.path.join(installed_dir, skin_name))
+    if actual is None:
+        return "missing"
+    if actual != expected:
+        return f"changed ({actual['files']}/{expected['files']} files, {actual['bytes']}/{expected['bytes']} bytes)"
+    return None
+
+def verify_installed(skins, installed_dir):
+    """Return {skin_name: reason} for manifest skins whose folder is missing or differs."""
+    names = list(skins)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=VERIFY_WORKERS, thread_name_prefix="verify") as pool:
+        reasons = pool.map(lambda name: _check_skin(installed_dir, name, skins[name]), names)
+        broken = {name: reason for name, reason in zip(names, reasons) if reason}
+
+    for name, reason in sorted(broken.items()):
+        logger.info("Skin needs repair: %s (%s)", name, reason)
+    return broken
+
+def installed_fingerprint(skins):
+    """Combined digest of the manifest fingerprints, stored in INSTALLED_HASH_FILE."""
+    crc = 0
+    for name in sorted(skins):
+        fp = skins[name].get("fingerprint") or {}
+        line = f"{name}:{fp.get('files')}:{fp.get('bytes')}:{fp.get('mtime')}|"
+        crc = zlib.crc32(line.encode("utf-8", errors="ignore"), crc)
+    return format(crc & 0xFFFFFFFF, '08x')
@@ -0,0 +1,87 @@
+import time
+import threading
+import urllib.parse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import metrics
+from config import APP_NAME
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+DEFAULT_TIMEOUT = 10
+POOL_CONNECTIONS = 8
+POOL_MAXSIZE = 8
+
+_session = None
+_session_lock = threading.Lock()
+
+_host_stats = {}
+_stats_lock = threading.Lock()
+
+def _build_session():
+    retry = Retry(
+        total=2,
+        connect=1,
+        read=0,
+        status=2,
+        backoff_factor=0.5,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = APP_NAME
+    return session
+
+def get_session():
+    """Process-wide keep-alive session shared by every module that talks HTTP."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _build_session()
+        return _session
+
+def _record(host, seconds, failed):
+    with _stats_lock:
+        stat = _host_stats.setdefault(host, {"requests": 0, "errors": 0, "total": 0.0, "max": 0.0})
+        stat["requests"] += 1
+        stat["errors"] += int(failed)
+        stat["total"] += seconds
+        stat["max"] = max(stat["max"], seconds)
+    metrics.observe(f"http.{host}_ms", seconds * 1000)
+    if failed:
+        metrics.incr(f"http.{host}.errors")
+
+def request(method, url, **kwargs):
+    """Send a request on the shared session with the default timeout, tracking per-host latency."""
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    host = urllib.parse.urlsplit(url).netloc
+    started = time.perf_counter()
+    failed = True
+    try:
+        response = get_session().request(method, url, **kwargs)
+        failed = False
+        return response
+    finally:
+        _record(host, time.perf_counter() - started, failed)
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+def head(url, **kwargs):
+    return request("HEAD", url, **kwargs)
+
+def log_host_stats():
+    with _stats_lock:
+        snapshot = {host: dict(stat) for host, stat in _host_stats.items()}
+    for host, stat in sorted(snapshot.items()):
+        logger.info(
+            "HTTP %s: %d requests, %d errors, avg %.0f ms, max %.0f ms",
+            host, stat["requests"], stat["errors"],
+            stat["total"] / stat["requests"] * 1000, stat["max"] * 1000,
+        )
@@ -0,0 +1,150 @@
+import time
+import queue
+import itertools
+import threading
+import metrics
+from settings import get_setting
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+SCOPE_ALL = "all"
+SCOPE_LIST = "list"
+SCOPE_ON_DEMAND = "on_demand"
+SCOPES = (SCOPE_ALL, SCOPE_LIST, SCOPE_ON_DEMAND)
+
+# Lower runs first: the champion being played jumps ahead of background work.
+PRIORITY_NOW = 0
+PRIORITY_BACKGROUND = 10
+
+def get_install_scope():
+    scope = get_setting("install_scope")
+    if scope not in SCOPES:
+        logger.warning("Invalid install_scope %r; installing all champions", scope)
+        return SCOPE_ALL
+    return scope
+
+def scope_champions(scope, all_champions, manifest):
+    """
+    Champions the startup sync covers for scope, and whether skins outside them are pruned.
+    on_demand only keeps champions that were already installed up to date.
+    """
+    if scope == SCOPE_LIST:
+        wanted = {name.lower() for name in get_setting("install_champions") or ()}
+        champions = [champ for champ in all_champions if champ.lower() in wanted]
+        missing = wanted.difference(champ.lower() for champ in champions)
+        if missing:
+            logger.warning("Unknown champions in install_champions: %s", ", ".join(sorted(missing)))
+        return champions, True
+    if scope == SCOPE_ON_DEMAND:
+        installed = {record.get("champion") for record in manifest.values()}
+        return [champ for champ in all_champions if champ in installed], False
+    return list(all_champions), True
+
+class OnDemandInstaller:
+    """
+    Installs single champions on a background thread, highest priority first.
+    install_fn(champion) does the work; a champion already queued is not queued twice,
+    but a higher priority request moves it up.
+    """
+
+    def __init__(self, install_fn):
+        self._install_fn = install_fn
+        self._queue = queue.PriorityQueue()
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self.installed = []
+
+    def request(self, champion, priority=PRIORITY_BACKGROUND):
+        with self._lock:
+            if champion in self._pending and self._pending[champion] <= priority:
+                return False
+            self._pending[champion] = priority
+        self._queue.put((priority, next(self._counter), champion))
+        logger.info("Queued on-demand install of %s (priority %d)", champion, priority)
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                priority, _, champion = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            with self._lock:
+                # Stale entry left behind when the champion was re-queued with a higher priority.
+                stale = self._pending.get(champion) != priority
+                if not stale:
+                    del self._pending[champion]
+            if stale:
+                self._queue.task_done()
+                continue
+            started = time.perf_counter()
+            metrics.incr("install.on_demand")
+            try:
+                self._install_fn(champion)
+                self.installed.append(champion)
+                logger.info("On-demand install of %s took %.0f ms", champion, (time.perf_counter() - started) * 1000)
+            except Exception:
+                logger.exception("On-demand install of %s failed", champion)
+            finally:
+                self._queue.task_done()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="on-demand-install", daemon=True)
+        self._thread.start()
+        return self
+
+    def join(self):
+        """Block until every queued install has run (for tests and benchmarks)."""
+        self._queue.join()
+
+    def stop(self):
+        self._stop.set()
+
+class ChampionDetector:
+    """
+    Polls the detect functions (champ select first, then the live game) while active()
+    is true and calls on_champion once for each newly detected champion.
+    """
+
+    def __init__(self, detect_fns, on_champion, active=lambda: True, interval=None):
+        self._detect_fns = detect_fns
+        self._on_champion = on_champion
+        self._active = active
+        self._interval = interval if interval is not None else get_setting("champion_poll_interval")
+        self._last = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @metrics.timed("detect.poll_ms")
+    def poll_once(self):
+        for detect in self._detect_fns:
+            champion = detect()
+            if champion:
+                if champion != self._last:
+                    self._last = champion
+                    logger.info("Detected champion %s", champion)
+                    self._on_champion(champion)
+                return champion
+        return None
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            if not self._active():
+                self._last = None
+                continue
+            try:
+                self.poll_once()
+            except Exception:
+                logger.exception("Champion detection failed")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="champion-detect", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
@@ -1,22 +1,146 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+import threading
 from config import LOG_DIR
 
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Rotation: "size" rolls a file over at max_bytes, "time" rolls it daily at midnight;
+# backup_count old files are kept per module.
+_log_config = {
+    "rotation": "size",
+    "max_bytes": 5 * 1024 * 1024,
+    "backup_count": 3,
+}
+
+_queue = queue.Queue(-1)
+_listener = None
+_listener_lock = threading.Lock()
+# Set in worker processes whose records are written by the parent (see forward_logs).
+_forwarding = False
+
+class _ModuleFileHandler(logging.Handler):
+    """Runs on the listener thread and writes each record to <LOG_DIR>/<logger name>.log."""
+
+    def __init__(self):
+        super().__init__()
+        self._handlers = {}
+        self._formatter = logging.Formatter(LOG_FORMAT)
+
+    def _handler_for(self, name):
+        handler = self._handlers.get(name)
+        if handler is None:
+            os.makedirs(LOG_DIR, exist_ok=True)
+            path = os.path.join(LOG_DIR, f"{name}.log")
+            if _log_config["rotation"] == "time":
+                handler = logging.handlers.TimedRotatingFileHandler(
+                    path, when="midnight", backupCount=_log_config["backup_count"], encoding="utf-8", delay=True)
+            else:
+                handler = logging.handlers.RotatingFileHandler(
+                    path, maxBytes=_log_config["max_bytes"], backupCount=_log_config["backup_count"],
+                    encoding="utf-8", delay=True)
+            handler.setFormatter(self._formatter)
+            self._handlers[name] = handler
+        return handler
+
+    def emit(self, record):
+        self._handler_for(record.name).handle(record)
+
+    def reset(self):
+        for handler in self._handlers.values():
+            handler.close()
+        self._handlers.clear()
+
+_file_handler = _ModuleFileHandler()
+
+def _ensure_listener():
+    global _listener
+    with _listener_lock:
+        if _listener is None and not _forwarding:
+            _listener = logging.handlers.QueueListener(_queue, _file_handler)
+            _listener.start()
+
+def stop_logging():
+    """Flush queued records and stop the listener thread (runs at exit)."""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+            _file_handler.reset()
+
+atexit.register(stop_logging)
+
+def _set_queue(log_queue):
+    """Point every logger set up here at log_queue."""
+    global _queue
+    _queue = log_queue
+    for logger in list(logging.Logger.manager.loggerDict.values()):
+        for handler in getattr(logger, "handlers", ()):
+            if isinstance(handler, logging.handlers.QueueHandler):
+                handler.queue = log_queue
+
+def _reset_after_fork():
+    # A forked child inherits neither the listener thread nor a usable lock, and the queue
+    # may hold the parent's records and a condition the parent's listener was waiting on.
+    global _listener, _listener_lock
+    _listener_lock = threading.Lock()
+    _listener = None
+    _file_handler._handlers.clear()
+    _set_queue(queue.Queue(-1))
+    _ensure_listener()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+def configure_logging(rotation=None, max_bytes=None, backup_count=None):
+    """Change rotation settings; files are reopened with them on the next record."""
+    updates = {"rotation": rotation, "max_bytes": max_bytes, "backup_count": backup_count}
+    with _listener_lock:
+        _log_config.update({k: v for k, v in updates.items() if v is not None})
+    # Let queued records drain with the old handlers before swapping them out.
+    stop_logging()
+    _ensure_listener()
+
+def start_log_relay(log_queue):
+    """Write the records worker processes put on log_queue (see forward_logs); stop() the returned listener."""
+    _ensure_listener()
+    relay = logging.handlers.QueueListener(log_queue, logging.handlers.QueueHandler(_queue))
+    relay.start()
+    return relay
+
+def forward_logs(log_queue):
+    """
+    In a worker process, send records to the parent's log_queue instead of writing log
+    files: only one process may own (and rotate) them, Windows cannot rename a file
+    another process holds open.
+    """
+    global _forwarding
+    stop_logging()
+    with _listener_lock:
+        _forwarding = True
+        _set_queue(log_queue)
+
 def setup_logger(name):
     logger = logging.getLogger(name)
+    if getattr(logger, "_lsm_configured", False):
+        return logger
     logger.setLevel(logging.INFO)
 
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    formatter = logging.Formatter(LOG_FORMAT)
 
-    # File handler
-    file_handler = logging.FileHandler(os.path.join(LOG_DIR, f"{name}.log"))
-    file_handler.setFormatter(formatter)
+    # File output goes through a queue so callers never block on disk writes
+    _ensure_listener()
+    logger.addHandler(logging.handlers.QueueHandler(_queue))
 
     # Console handler (only errors)
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.ERROR)
     console_handler.setFormatter(formatter)
 
-    logger.addHandler(file_handler)
     logger.addHandler(console_handler)
+    logger._lsm_configured = True
     return logger
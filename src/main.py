@@ -2,34 +2,31 @@ import sys
 import os
 import time
 import threading
+import concurrent.futures
 import subprocess
+import multiprocessing
 import ctypes
 from ctypes import wintypes
-import zlib
-import logging
-import shutil
-import pythoncom
-import winreg
-import requests
-import psutil
 import socket
-import wmi
 
-from logger import setup_logger
-from champions import get_champion_names
-from skin_downloader import download_repo
-from skin_installer import install_skins
-from update_checker import check_and_update, get_installed_version, get_latest_manager_version, get_latest_lol_version, get_latest_repo_commit
+# Heavy or platform-specific modules (requests, psutil, wmi, pystray, PIL, winreg and the
+# install/update modules) are imported inside the functions that first need them, so the
+# service reaches the tray without paying for subsystems that may never run.
+from logger import setup_logger, configure_logging
+from settings import apply_cli_args, get_install_workers, get_setting
+from pipeline import run_stages
+import metrics
+from startup_report import enable_import_timing, log_startup_report
 from config import (
-    PROJECT_ROOT, DOWNLOAD_DIR, INSTALL_DIR, LOG_DIR, DATA_DIR, UNINSTALL_APP_NAME,
-    INSTALLED_DIR, LOL_VERSION_FILE, VERSION_FILE, INSTALLED_HASH_FILE, APP_NAME, SKIN_REPO_COMMIT_FILE
+    PROJECT_ROOT, INSTALL_DIR, INSTALLED_DIR, LOL_VERSION_FILE, INSTALLED_HASH_FILE, APP_NAME, SKIN_REPO_COMMIT_FILE,
+    REPO_ZIP_PATH, SKINS_REPO_URL, ensure_dirs
 )
 
-import pystray
-from PIL import Image, ImageDraw
-
 APP_MUTEX_NAME = "LeagueSkinManagerVN_Mutex_v1"
 
+LEAGUE_PROCESS = "LeagueClient.exe"
+MANAGER_PROCESS = "cslol-manager.exe"
+
 STATUS_WAITING = "Waiting for League Client"
 STATUS_INSTALLING = "Installing skins"
 STATUS_FOUND = "League Client detected"
@@ -38,36 +35,72 @@ COLOR_BLUE = (30, 144, 255)
 COLOR_YELLOW = (255, 200, 0)
 COLOR_GREEN = (50, 205, 50)
 
+# Time from process start to the tray icon being shown that the startup report checks against.
+TIME_TO_TRAY_TARGET_MS = 1500
+
 current_status = STATUS_WAITING
 
 logger = setup_logger(__name__)
 
 # ---------- Utilities ----------
-def check_internet_connection(timeout=5.0):
-    """Check internet connection using multiple endpoints."""
-    test_urls = [
-        "https://api.github.com",
-        "https://ddragon.leagueoflegends.com",
-        "https://www.google.com/generate_204"
-    ]
-
-    for url in test_urls:
-        try:
-            response = requests.head(url, timeout=timeout, allow_redirects=True)
-            if response.status_code in (200, 204, 302, 405):
-                return True, None
-        except requests.exceptions.RequestException:
-            continue
+INTERNET_CHECK_URLS = [
+    "https://api.github.com",
+    "https://ddragon.leagueoflegends.com",
+    "https://www.google.com/generate_204"
+]
+# A successful probe is trusted for this long before probing again.
+INTERNET_CHECK_TTL = 60
+
+_internet_ok_at = None
+_internet_lock = threading.Lock()
+
+def _probe_url(url, timeout):
+    import http_session
+    response = http_session.head(url, timeout=timeout, allow_redirects=True)
+    return response.status_code in (200, 204, 302, 405)
 
-    if not is_connected_to_network():
-        return False, "No network connection. Check Wi-Fi/Ethernet."
-    if is_connected_to_network() and not is_dns_working():
-        return False, "DNS resolution failed. Check DNS/router settings."
-    return False, "Unable to connect. Check internet/firewall."
+def check_internet_connection(timeout=5.0):
+    """Check internet connection by racing all endpoints; the first success wins."""
+    global _internet_ok_at
+    import requests
+    with _internet_lock:
+        if _internet_ok_at is not None and time.monotonic() - _internet_ok_at < INTERNET_CHECK_TTL:
+            return True, None
+
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=len(INTERNET_CHECK_URLS), thread_name_prefix="net-probe")
+    futures = [pool.submit(_probe_url, url, timeout) for url in INTERNET_CHECK_URLS]
+    try:
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                if future.result():
+                    with _internet_lock:
+                        _internet_ok_at = time.monotonic()
+                    return True, None
+            except requests.exceptions.RequestException:
+                continue
+    finally:
+        # Probes still in flight are left to finish on their own timeout.
+        for future in futures:
+            future.cancel()
+        pool.shutdown(wait=False)
+
+    return False, diagnose_network()
+
+def diagnose_network():
+    """Run the interface and DNS checks once, in parallel, and describe the failure."""
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="net-diag") as pool:
+        network = pool.submit(is_connected_to_network)
+        dns = pool.submit(is_dns_working)
+        if not network.result():
+            return "No network connection. Check Wi-Fi/Ethernet."
+        if not dns.result():
+            return "DNS resolution failed. Check DNS/router settings."
+    return "Unable to connect. Check internet/firewall."
 
 def is_connected_to_network():
     """Check for network connection."""
     try:
+        import psutil
         return any(
             interface_addresses for interface, interface_addresses in psutil.net_if_addrs().items()
             if '127.0.0.1' not in [addr.address for addr in interface_addresses]
@@ -98,9 +131,20 @@ def handle_internet_check():
     logger.info("Internet verified")
     return True
 
+def log_time_since_start(milestone, target_ms=None):
+    try:
+        import psutil
+        elapsed_ms = (time.time() - psutil.Process().create_time()) * 1000
+        logger.info("Time to %s: %.0f ms after process start", milestone, elapsed_ms)
+        if target_ms is not None and get_setting("startup_report"):
+            log_startup_report(milestone, elapsed_ms, target_ms)
+    except Exception:
+        logger.debug("Could not compute time to %s", milestone)
+
 def add_to_startup():
     """Add the executable to Windows startup registry if not already present."""
     try:
+        import winreg
         exe_path = sys.executable
         key_path = r"Software\Microsoft\Windows\CurrentVersion\Run"
         key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, key_path, 0, winreg.KEY_ALL_ACCESS)
@@ -167,8 +211,15 @@ def ensure_windows():
         sys.exit(1)
 
 def ensure_paths():
-    for d in (DOWNLOAD_DIR, INSTALL_DIR, LOG_DIR, INSTALLED_DIR):
-        os.makedirs(d, exist_ok=True)
+    # An interrupted manager update must be finished before the folders are recreated.
+    from update_checker import recover_manager_update
+    from repo_patch import recover_repo_patch
+    recover_manager_update()
+    recover_repo_patch()
+    ensure_dirs()
+    # Trash left by an earlier run is purged in the background from here on.
+    from trash import start_purger
+    start_purger()
 
 def create_mutex():
     """Create a named mutex to ensure single instance (Win32)."""
@@ -211,20 +262,25 @@ def exit_if_already_running():
         sys.exit(0)
     return mutex
 
-def simple_folder_hash(path):
-    """Very fast (not cryptographically secure) hash of folder names in INSTALLED_DIR."""
+def check_installed_state():
+    """
+    Verify installed skins against their manifest fingerprints.
+    Returns (fingerprint, repairs) where repairs maps skin names to why they need
+    re-extracting; fingerprint is None if verification itself failed. An empty manifest
+    has a fingerprint of its own, so a scope that installs nothing is not redone every start.
+    """
     try:
-        entries = []
-        if os.path.exists(path):
-            for name in os.listdir(path):
-                if os.path.isdir(os.path.join(path, name)):
-                    entries.append(name)
-        entries.sort()
-        s = "|".join(entries).encode("utf-8", errors="ignore")
-        return format(zlib.crc32(s) & 0xFFFFFFFF, '08x')
-    except Exception as e:
-        logger.exception("Hashing failed")
-        return None
+        from skin_manifest import load_manifest
+        from fingerprint import verify_installed, installed_fingerprint
+        started = time.perf_counter()
+        skins = load_manifest()
+        repairs = verify_installed(skins, INSTALLED_DIR)
+        logger.info("Verified %d installed skins in %.0f ms (%d need repair)",
+                    len(skins), (time.perf_counter() - started) * 1000, len(repairs))
+        return installed_fingerprint(skins), repairs
+    except Exception:
+        logger.exception("Installed skin verification failed")
+        return None, {}
 
 def read_hash():
     try:
@@ -241,6 +297,9 @@ def write_hash(h):
         logger.exception("Failed to write hash file")
 
 def is_process_running_by_name(name):
+    if process_watcher is not None:
+        return process_watcher.is_running(name)
+    import psutil
     name = name.lower()
     for p in psutil.process_iter(["name"]):
         try:
@@ -250,8 +309,35 @@ def is_process_running_by_name(name):
             continue
     return False
 
+def expand_archived_skins(champion=None):
+    """In the archive layout, extract the skins enabled in profiles (and champion's skins) in full."""
+    if get_setting("install_layout") != "archive":
+        return 0
+    from skin_archive import expand_skins, profile_skins
+    from skin_manifest import load_manifest
+    names = profile_skins()
+    if champion is not None:
+        names.update(name for name, record in load_manifest().items() if record.get("champion") == champion)
+    return expand_skins(sorted(names))
+
+def expand_on_manager_start(event):
+    """
+    A manager started outside the tray loads whatever installed/ holds, so archived skins
+    enabled in its profiles are expanded as soon as it is seen (off the watcher thread).
+    """
+    from process_watch import START
+    if event.kind != START or event.name != MANAGER_PROCESS.lower():
+        return
+    if get_setting("install_layout") != "archive":
+        return
+    threading.Thread(target=expand_archived_skins, name="expand-skins", daemon=True).start()
+
 def launch_cslol_manager():
     exe_path = os.path.join(INSTALL_DIR, "cslol-manager.exe")
+    try:
+        expand_archived_skins()
+    except Exception:
+        logger.exception("Failed to expand archived skins before launch")
     if os.path.exists(exe_path):
         try:
             subprocess.Popen([exe_path], shell=False)
@@ -270,16 +356,49 @@ _install_lock = threading.Lock()
 _install_in_progress = threading.Event()
 _install_successful = threading.Event()
 
-def install_all_skins(skip_chromas=True):
+def load_repo_source():
+    """
+    (index, source) to install from: with repo_source "remote" and no downloaded zip, the
+    index of the remote repo zip and the RemoteZip itself; otherwise the downloaded zip's
+    index and None. (None, None) when neither is available.
+    """
+    from skin_downloader import download_repo
+    from repo_index import load_repo_index
+
+    if get_setting("repo_source") == "remote" and not os.path.exists(REPO_ZIP_PATH):
+        from remote_zip import open_remote_repo
+        remote = open_remote_repo(get_setting("remote_repo_url") or SKINS_REPO_URL,
+                                  max(1, int(get_setting("download_connections") or 1)))
+        if remote is not None:
+            try:
+                return remote.load_index(), remote
+            except Exception as e:
+                logger.warning("Could not read the remote repo index (%s); downloading instead", e)
+
+    if not download_repo():
+        logger.error("Failed to download skins repository.")
+        return None, None
+    return load_repo_index(), None
+
+@metrics.timed("install.all_ms")
+def install_all_skins(skip_chromas=True, repair=None):
     """Download repo (if needed) and install every champion's skins (skip chromas by default)."""
     if _install_in_progress.is_set():
         return
     _install_in_progress.set()
+    _install_lock.acquire()
     try:
+        from champions import get_champion_names
+        from install_scope import get_install_scope, scope_champions
+        from skin_installer import sync_skins, peak_rss_bytes
+        from skin_manifest import load_manifest
+        from fingerprint import installed_fingerprint
+        from update_checker import get_latest_lol_version, get_latest_repo_commit
+
         set_status(STATUS_INSTALLING)
         logger.info("Starting auto-install of all champion skins (skip chromas=%s)", skip_chromas)
-        if not download_repo():
-            logger.error("Failed to download skins repository.")
+        index, source = load_repo_source()
+        if index is None:
             return
 
         champions = get_champion_names()
@@ -287,13 +406,28 @@ def install_all_skins(skip_chromas=True):
             logger.warning("Could not fetch champion list; aborting install.")
             return
 
-        total_installed = 0
-        for i, champ in enumerate(champions, 1):
-            logger.info("Installing (%d/%d): %s", i, len(champions), champ)
-            installed = install_skins(champ, skip_chromas)
-            total_installed += (installed or 0)
-
-        h = simple_folder_hash(INSTALLED_DIR)
+        scope = get_install_scope()
+        champions, prune = scope_champions(scope, champions, load_manifest())
+        logger.info("Install scope %s: %d champions (prune=%s)", scope, len(champions), prune)
+
+        total_installed, removed, unchanged = sync_skins(
+            champions,
+            skip_chromas,
+            workers=get_install_workers(),
+            executor=get_setting("install_executor"),
+            index=index,
+            repair=repair,
+            prune=prune,
+            source=source,
+        )
+        logger.info("Skin sync: %d installed, %d removed, %d unchanged", total_installed, removed, unchanged)
+        metrics.incr("sync.installed", total_installed)
+        metrics.incr("sync.removed", removed)
+        metrics.incr("sync.unchanged", unchanged)
+        expand_archived_skins()
+        log_network_stats()
+
+        h = installed_fingerprint(load_manifest())
         if h:
             write_hash(h)
             logger.info("Wrote installed hash %s", h)
@@ -315,32 +449,88 @@ def install_all_skins(skip_chromas=True):
 
         _install_successful.set()
         logger.info("Auto-install finished. Total installed skins (approx): %d", total_installed)
+        log_time_since_start("ready")
+        peak_rss = peak_rss_bytes()
+        if peak_rss:
+            logger.info("Peak RSS during install: %.1f MiB", peak_rss / (1024 * 1024))
 
     except Exception:
         logger.exception("Auto-install encountered an error")
     finally:
+        _install_lock.release()
         _install_in_progress.clear()
-        if is_process_running_by_name("LeagueClient.exe"):
+        if process_watcher is not None:
+            reconcile_league_state()
+        elif is_process_running_by_name("LeagueClient.exe"):
             set_status(STATUS_FOUND)
         else:
             set_status(STATUS_WAITING)
 
+def install_champion_now(champion, skip_chromas=True):
+    """Install one champion's skins without touching the others (on-demand scope)."""
+    from skin_installer import sync_skins
+    from skin_manifest import load_manifest
+    from fingerprint import installed_fingerprint
+
+    # Waits for a running full sync; both write the manifest and the install journal.
+    with _install_lock:
+        _install_in_progress.set()
+        set_status(STATUS_INSTALLING)
+        try:
+            index, source = load_repo_source()
+            if index is None:
+                return 0
+            # Live client and champ select names may differ in case from the repo folders.
+            champion = next((name for name in index if name.lower() == champion.lower()), champion)
+            installed, _, unchanged = sync_skins(
+                [champion], skip_chromas, workers=1, index=index, prune=False, source=source)
+            logger.info("On-demand sync of %s: %d installed, %d unchanged", champion, installed, unchanged)
+            expand_archived_skins(champion)
+            if installed:
+                h = installed_fingerprint(load_manifest())
+                if h:
+                    write_hash(h)
+            return installed
+        finally:
+            _install_in_progress.clear()
+            if process_watcher is not None:
+                reconcile_league_state()
+
+on_demand_installer = None
+champion_detector = None
+
+def start_on_demand():
+    """In on-demand scope, install the champion picked in champ select or played in game as soon as it is seen."""
+    global on_demand_installer, champion_detector
+    from install_scope import (
+        get_install_scope, SCOPE_ON_DEMAND, PRIORITY_NOW, OnDemandInstaller, ChampionDetector
+    )
+    if get_install_scope() != SCOPE_ON_DEMAND:
+        return None
+    from champions import get_champ_select_champion, get_current_champion
+
+    on_demand_installer = OnDemandInstaller(install_champion_now).start()
+    champion_detector = ChampionDetector(
+        [lambda: get_champ_select_champion(process_watcher.pids(LEAGUE_PROCESS)), get_current_champion],
+        lambda champion: on_demand_installer.request(champion, PRIORITY_NOW),
+        active=lambda: process_watcher is not None and process_watcher.is_running(LEAGUE_PROCESS),
+    ).start()
+    logger.info("On-demand skin installs enabled")
+    return on_demand_installer
+
 # ---------- Tray / Polling ----------
 
 tray_icon = None
+tray_state = None
 tray_thread = None
-polling_thread = None
+process_watcher = None
 last_launch_league_pid = None
+_league_state_lock = threading.Lock()
 _stop_threads = threading.Event()
 _tray_lock = threading.Lock()
 
-def make_colored_icon(rgb, size=64):
-    img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
-    d = ImageDraw.Draw(img)
-    d.ellipse((8, 8, size - 8, size - 8), fill=rgb)
-    return img
-
 def _build_menu():
+    import pystray
     return pystray.Menu(
         pystray.MenuItem(lambda *args: f"Status: {current_status}", None, enabled=False),
         pystray.MenuItem('Start CSLOL Manager', on_start_manager, default=True),
@@ -353,6 +543,15 @@ def on_start_manager(icon, item):
 def on_exit(icon, item):
     logger.info("User requested exit from tray")
     _stop_threads.set()
+    if process_watcher is not None:
+        process_watcher.stop()
+    if champion_detector is not None:
+        champion_detector.stop()
+    if on_demand_installer is not None:
+        on_demand_installer.stop()
+    from trash import stop_purger
+    stop_purger()
+    metrics.stop_metrics()
     try:
         icon.stop()
     except Exception:
@@ -361,80 +560,53 @@ def on_exit(icon, item):
     sys.exit(0)
 
 def set_status(new_status):
-    """Thread-safe update of tray icon image and menu text."""
-    global current_status, tray_icon
+    """Thread-safe update of tray icon image and menu text; no-op if the status is unchanged."""
+    global current_status
     with _tray_lock:
+        if new_status == current_status and tray_state is not None:
+            return
         current_status = new_status
-        if tray_icon:
-            if new_status == STATUS_INSTALLING:
-                icon_img = make_colored_icon(COLOR_YELLOW)
-            elif new_status == STATUS_FOUND:
-                icon_img = make_colored_icon(COLOR_GREEN)
-            else:
-                icon_img = make_colored_icon(COLOR_BLUE)
-            try:
-                tray_icon.icon = icon_img
-                tray_icon.menu = _build_menu()
-            except Exception:
-                logger.debug("Failed to set tray icon/menu (maybe not initialized yet)")
+        if tray_state is not None:
+            tray_state.set(new_status)
 
-def event_watcher_loop():
-    """Lightweight WMI query for League Client, low-CPU, standard user permissions."""
+def reconcile_league_state(event=None):
+    """Update status and launch CSLOL Manager from the watcher's view of running processes."""
     global last_launch_league_pid
-    try:
-        pythoncom.CoInitialize() 
-        c = wmi.WMI() 
-        while not _stop_threads.is_set():
-            try:
-                processes = c.Win32_Process(name="LeagueClient.exe")
-                if _install_in_progress.is_set():
-                    set_status(STATUS_INSTALLING)
-                elif processes:  
-                    current_pid = processes[0].ProcessId
-                    set_status(STATUS_FOUND)
-                    if (last_launch_league_pid != current_pid and
-                        not is_process_running_by_name("cslol-manager.exe")):
-                        launch_cslol_manager()
-                        last_launch_league_pid = current_pid
-                else:
-                    set_status(STATUS_WAITING)
-                    last_launch_league_pid = None
-                time.sleep(10)
-            
-            except Exception as e:
-                logger.error("WMI query error: %s", e)
-                
-    except Exception as e:
-        logger.exception("WMI setup failed; fall back to polling")
-        polling_loop()
-    finally:
-        logger.info("Event watcher stopped")
-
-def polling_loop():
-    global last_launch_league_pid
-    while not _stop_threads.is_set():
-        league_proc = None
-        for p in psutil.process_iter(["pid", "name"]):
-            if p.info["name"] and p.info["name"].lower() == "leagueclient.exe":
-                league_proc = p
-                break
-
+    with _league_state_lock:
+        league_pids = process_watcher.pids(LEAGUE_PROCESS)
         if _install_in_progress.is_set():
             set_status(STATUS_INSTALLING)
+        elif league_pids:
+            current_pid = min(league_pids)
+            set_status(STATUS_FOUND)
+            if (last_launch_league_pid != current_pid and
+                not process_watcher.is_running(MANAGER_PROCESS)):
+                launch_cslol_manager()
+                last_launch_league_pid = current_pid
         else:
-            if league_proc:
-                set_status(STATUS_FOUND)
-                if (last_launch_league_pid != league_proc.pid
-                    and not is_process_running_by_name("cslol-manager.exe")):
-                    launch_cslol_manager()
-                    last_launch_league_pid = league_proc.pid
-            else:
-                set_status(STATUS_WAITING)
-                last_launch_league_pid = None
-        _stop_threads.wait(5)
+            set_status(STATUS_WAITING)
+            last_launch_league_pid = None
+
+def start_process_watcher(backend=None):
+    """Start watching League Client / CSLOL Manager; status changes are driven by start/stop events."""
+    global process_watcher
+    from process_watch import ProcessWatcher
+    process_watcher = ProcessWatcher([LEAGUE_PROCESS, MANAGER_PROCESS], backend)
+    process_watcher.subscribe(reconcile_league_state)
+    process_watcher.subscribe(expand_on_manager_start)
+    process_watcher.start()
+    return process_watcher
 
 def start_tray():
-    global tray_icon, tray_thread, watcher_thread
+    global tray_icon, tray_thread, tray_state
+    import pystray
+    from PIL import Image
+    from tray_state import TrayState
+    tray_state = TrayState({
+        STATUS_WAITING: COLOR_BLUE,
+        STATUS_INSTALLING: COLOR_YELLOW,
+        STATUS_FOUND: COLOR_GREEN,
+    })
     icon_image = None
     exe_icon_path = os.path.join(PROJECT_ROOT, "icon.ico")
     if os.path.exists(exe_icon_path):
@@ -443,70 +615,104 @@ def start_tray():
         except Exception:
             icon_image = None
     if icon_image is None:
-        icon_image = make_colored_icon(COLOR_BLUE)
+        icon_image = tray_state.icon_for(STATUS_WAITING)
 
     tray_icon = pystray.Icon("LeagueSkinManagerVN", icon_image, "LeagueSkinManagerVN", _build_menu())
 
-    set_status(current_status)
-    
-    league_proc = None
-    for p in psutil.process_iter(["pid", "name"]):
-        if p.info["name"] and p.info["name"].lower() == "leagueclient.exe":
-            league_proc = p
-            break
-    if league_proc:
-        set_status(STATUS_FOUND)
-        if not is_process_running_by_name("cslol-manager.exe") and not _install_in_progress.is_set():
-            launch_cslol_manager()
-            global last_launch_league_pid
-            last_launch_league_pid = league_proc.pid
-    
-    watcher_thread = threading.Thread(target=event_watcher_loop, daemon=True)  # Renamed from polling_thread
-    watcher_thread.start()
-    
+    with _tray_lock:
+        tray_state.attach(tray_icon, current_status)
+
+    try:
+        start_process_watcher()
+        reconcile_league_state()
+    except Exception:
+        logger.exception("Process watcher failed to start")
+
+    try:
+        start_on_demand()
+    except Exception:
+        logger.exception("On-demand installs failed to start")
+
+    log_time_since_start("tray", TIME_TO_TRAY_TARGET_MS)
     tray_icon.run()
 
 # ---------- Startup ----------
 
+def run_update_check():
+    from update_checker import check_and_update
+    return check_and_update()
+
+def log_network_stats():
+    from metadata_client import log_stats as log_metadata_stats
+    from http_session import log_host_stats
+    log_metadata_stats()
+    log_host_stats()
+
 def main():
     ensure_windows()
-    if not handle_internet_check():
-        return
+    apply_cli_args(sys.argv[1:])
+    if get_setting("startup_report"):
+        enable_import_timing()
+    configure_logging(
+        rotation=get_setting("log_rotation"),
+        max_bytes=get_setting("log_max_bytes"),
+        backup_count=get_setting("log_backup_count"),
+    )
+    if get_setting("metrics_enabled"):
+        metrics.start_metrics(get_setting("metrics_flush_interval"), get_setting("metrics_http_port"))
 
     mutex = exit_if_already_running()
     ensure_paths()
-    add_to_startup()
-    ensure_searchable_in_startmenu()
 
-    logger.info("Checking for updates")
-    try:
-        update_results = check_and_update()
+    # Local work (startup entries, installed skin verification) overlaps the network checks;
+    # only the update check waits for the connectivity probe.
+    stages = run_stages("startup", [
+        ("internet", lambda r: handle_internet_check(), ()),
+        ("startup_entries", lambda r: (add_to_startup(), ensure_searchable_in_startmenu()), ()),
+        ("installed_state", lambda r: check_installed_state(), ()),
+        ("updates", lambda r: run_update_check(), ("internet",)),
+    ])
+
+    update_results = stages["updates"]
+    if update_results is None:
+        logger.error("Update check failed")
+    else:
         if update_results.get('manager_updated'):
             logger.info("CSLOL Manager updated by update checker")
         if update_results.get('lol_version_changed'):
             logger.info("LoL version changed and skins were reset by update checker")
         if update_results.get('skin_repo_commit_changed'):
             logger.info("Skin repo commit changed and skins were reset by update checker")
-    except Exception:
-        logger.exception("Update check failed")
+        if update_results.get('skin_repo_patched'):
+            logger.info("Skin repo commit changed and the repo zip was patched; changed skins will be synced")
+
+    log_network_stats()
 
+    installed_state = stages["installed_state"]
+    if update_results and (update_results.get('manager_updated') or update_results.get('lol_version_changed')
+                           or update_results.get('skin_repo_commit_changed')):
+        # Verification ran while the update check reset skins or moved the manager folder.
+        installed_state = check_installed_state()
     current_hash = read_hash()
-    new_hash = simple_folder_hash(INSTALLED_DIR)
+    new_hash, repairs = installed_state or (None, {})
     needs_install = False
     if current_hash is None or new_hash is None:
         needs_install = True
-    elif current_hash != new_hash:
+    elif current_hash != new_hash or repairs:
         needs_install = True
 
-    logger.info("Installed hash (file)=%s computed=%s needs_install=%s", current_hash, new_hash, needs_install)
+    logger.info("Installed hash (file)=%s computed=%s repairs=%d needs_install=%s",
+                current_hash, new_hash, len(repairs), needs_install)
 
     installer_thread = None 
     if needs_install:
-        installer_thread = threading.Thread(target=install_all_skins, kwargs={'skip_chromas': True}, daemon=True)
+        installer_thread = threading.Thread(target=install_all_skins,
+                                            kwargs={'skip_chromas': True, 'repair': repairs}, daemon=True)
         installer_thread.start()
     else:
         logger.info("No install required; skipping auto-install.")
         _install_successful.set()
+        log_time_since_start("ready")
 
     try:
         start_tray()
@@ -517,6 +723,7 @@ def main():
         sys.exit(0)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     try:
         main()
     except KeyboardInterrupt:
@@ -0,0 +1,180 @@
+import os
+import zlib
+import collections
+from config import MANAGER_MANIFEST_FILE, INSTALL_DIR
+from staging import read_state, write_state
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+MANIFEST_VERSION = 1
+CRC_CHUNK_SIZE = 1024 * 1024
+
+# Top level names in INSTALL_DIR that belong to this app or the user, never to a release.
+PRESERVED = ("installed", "installed.staging", "blobs", "archives", "version.txt")
+
+ManagerDiff = collections.namedtuple("ManagerDiff", ["write", "unchanged", "stale", "files"])
+
+def load_manager_manifest(path=MANAGER_MANIFEST_FILE):
+    """Return {relative path: {"size", "crc", "mtime"}} of the installed manager files."""
+    data = read_state(path)
+    if data is None or data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data.get("files", {})
+
+def save_manager_manifest(files, path=MANAGER_MANIFEST_FILE):
+    try:
+        write_state(path, {"version": MANIFEST_VERSION, "files": files})
+        return True
+    except Exception as e:
+        logger.error("Failed to write manager manifest %s: %s", path, e)
+        return False
+
+def file_crc32(path):
+    crc = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CRC_CHUNK_SIZE), b""):
+            crc = zlib.crc32(chunk, crc)
+    return crc & 0xFFFFFFFF
+
+def _is_preserved(rel_path):
+    return rel_path.split("/", 1)[0] in PRESERVED
+
+def _is_user_profile(rel_path):
+    """Profiles saved in the manager; the rest of profiles/ belongs to the release."""
+    return rel_path.startswith("profiles/") and rel_path.endswith(".profile")
+
+def _walk_manager_files(install_dir):
+    """(relative path, path) of every file in install_dir that belongs to the manager release."""
+    for root, dirs, names in os.walk(install_dir):
+        rel_root = os.path.relpath(root, install_dir).replace(os.sep, "/")
+        if rel_root == ".":
+            dirs[:] = [d for d in dirs if d not in PRESERVED]
+            rel_root = ""
+        for name in names:
+            rel_path = f"{rel_root}/{name}" if rel_root else name
+            if _is_preserved(rel_path) or _is_user_profile(rel_path):
+                continue
+            yield rel_path, os.path.join(root, name)
+
+def release_files(archive):
+    """
+    {relative path: ZipInfo} of the files in a release zip, without the top level
+    cslol-manager/ folder the releases ship.
+    """
+    infos = [info for info in archive.infolist() if not info.is_dir()]
+    prefix = os.path.basename(INSTALL_DIR) + "/"
+    strip = bool(infos) and all(info.filename.startswith(prefix) for info in infos)
+    files = {}
+    for info in infos:
+        rel_path = info.filename[len(prefix):] if strip else info.filename
+        parts = [p for p in rel_path.replace("\\", "/").split("/") if p not in ("", ".", "..")]
+        if parts and not _is_preserved("/".join(parts)):
+            files["/".join(parts)] = info
+    return files
+
+def _record(path, crc):
+    st = os.stat(path)
+    return {"size": st.st_size, "crc": crc, "mtime": st.st_mtime_ns}
+
+def plan_manager_diff(archive, install_dir=INSTALL_DIR, manifest=None):
+    """
+    Compare a release zip against the installed manager. A file is unchanged when its
+    size and CRC32 match the zip entry; the CRC comes from the manifest while the file's
+    size and mtime still match the recorded ones, so unchanged files are normally not read.
+    Stale files are manifest entries the release no longer ships.
+
+    Without a manifest (the first differential update) nothing on disk is known to match
+    a release, so every release file is written and every other manager file found by a
+    scan is stale, the same result as a full install. Profiles saved by the user are kept.
+    """
+    if manifest is None:
+        manifest = load_manager_manifest()
+    full = not manifest
+    release = release_files(archive)
+    write = []
+    unchanged = 0
+    files = {}
+    for rel_path, info in sorted(release.items()):
+        target = os.path.join(install_dir, *rel_path.split("/"))
+        if _is_user_profile(rel_path) and os.path.exists(target):
+            unchanged += 1
+            continue
+        try:
+            st = os.stat(target)
+        except FileNotFoundError:
+            st = None
+        if not full and st is not None and st.st_size == info.file_size:
+            record = manifest.get(rel_path)
+            if record and record.get("size") == st.st_size and record.get("mtime") == st.st_mtime_ns:
+                crc = record["crc"]
+            else:
+                crc = file_crc32(target)
+            if crc == info.CRC:
+                unchanged += 1
+                files[rel_path] = {"size": st.st_size, "crc": crc, "mtime": st.st_mtime_ns}
+                continue
+        write.append((rel_path, info))
+    if full:
+        stale = sorted(rel_path for rel_path, _ in _walk_manager_files(install_dir) if rel_path not in release)
+    else:
+        stale = sorted(rel_path for rel_path in manifest
+                       if rel_path not in release and not _is_user_profile(rel_path))
+    return ManagerDiff(write, unchanged, stale, files)
+
+def find_locked_files(diff, install_dir=INSTALL_DIR):
+    """Files the diff would replace or delete that cannot be opened for writing (e.g. a running exe)."""
+    locked = []
+    targets = [rel_path for rel_path, _ in diff.write] + list(diff.stale)
+    for rel_path in targets:
+        target = os.path.join(install_dir, *rel_path.split("/"))
+        if not os.path.exists(target):
+            continue
+        try:
+            with open(target, 'r+b'):
+                pass
+        except OSError:
+            locked.append(rel_path)
+    return locked
+
+def apply_manager_diff(archive, diff, install_dir=INSTALL_DIR):
+    """
+    Write changed and new files (each through a temp file and os.replace), delete stale ones
+    and return (bytes_written, files) where files is the manifest of the updated manager.
+    """
+    files = dict(diff.files)
+    bytes_written = 0
+    for rel_path, info in diff.write:
+        target = os.path.join(install_dir, *rel_path.split("/"))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = target + ".lsm-new"
+        try:
+            with archive.open(info) as src, open(tmp_path, 'wb') as dst:
+                for chunk in iter(lambda: src.read(CRC_CHUNK_SIZE), b""):
+                    dst.write(chunk)
+            os.replace(tmp_path, target)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        bytes_written += info.file_size
+        files[rel_path] = _record(target, info.CRC)
+
+    for rel_path in diff.stale:
+        target = os.path.join(install_dir, *rel_path.split("/"))
+        try:
+            os.remove(target)
+        except FileNotFoundError:
+            pass
+        # Drop folders the release no longer uses, stopping at the first one still in use.
+        parent = os.path.dirname(target)
+        while parent != install_dir and os.path.isdir(parent) and not os.listdir(parent):
+            os.rmdir(parent)
+            parent = os.path.dirname(parent)
+    return bytes_written, files
+
+def scan_manager_files(install_dir=INSTALL_DIR):
+    """Manifest of every manager file in install_dir (used after a full, non-differential install)."""
+    files = {}
+    for rel_path, path in _walk_manager_files(install_dir):
+        files[rel_path] = _record(path, file_crc32(path))
+    return files
@@ -0,0 +1,176 @@
+import io
+import os
+import mmap
+import zlib
+import zipfile
+import threading
+from config import REPO_ZIP_PATH
+from repo_index import ENTRY_CHUNK_SIZE, _LOCAL_HEADER, _LOCAL_HEADER_SIG
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+class ViewFile(io.RawIOBase):
+    """
+    Read-only, seekable file over a memoryview. read() returns a bytes copy, since zipfile
+    needs bytes (its header parsing and read buffers do not take memoryviews), so a stored
+    entry read this way is copied once, as with a file read; readinto() copies straight
+    into the caller's buffer.
+    """
+
+    def __init__(self, view):
+        super().__init__()
+        self._view = view
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = len(self._view) + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if pos < 0:
+            raise ValueError("Negative seek position")
+        self._pos = pos
+        return pos
+
+    def read(self, size=-1):
+        end = len(self._view) if size is None or size < 0 else min(self._pos + size, len(self._view))
+        if end <= self._pos:
+            return b""
+        data = self._view[self._pos:end].tobytes()
+        self._pos = end
+        return data
+
+    def readinto(self, buffer):
+        end = min(self._pos + len(buffer), len(self._view))
+        n = max(end - self._pos, 0)
+        buffer[:n] = self._view[self._pos:end]
+        self._pos += n
+        return n
+
+    def close(self):
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        super().close()
+
+class MappedZip:
+    """
+    The repo zip mapped read-only once. Local headers are parsed straight from the mapping
+    and entry data is handed out as memoryview slices, so reads do not go through a file
+    position: one instance is shared by every install thread, and forked workers inherit it.
+    Deflated entries are inflated from the slices without an intermediate copy; stored
+    entries opened with zipfile still copy what it reads (see ViewFile).
+    Used wherever repo_index takes a repo file (see open_stored_entry and copy_entry there).
+    """
+
+    def __init__(self, path=REPO_ZIP_PATH):
+        self.path = path
+        st = os.stat(path)
+        self.key = (st.st_size, st.st_mtime_ns)
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+    def data_offset(self, entry):
+        offset = entry["offset"]
+        if offset + _LOCAL_HEADER.size > len(self._view):
+            raise zipfile.BadZipFile(f"Truncated local header for {entry['name']}")
+        fields = _LOCAL_HEADER.unpack_from(self._view, offset)
+        if fields[0] != _LOCAL_HEADER_SIG:
+            raise zipfile.BadZipFile(f"Bad local header signature for {entry['name']}")
+        return offset + _LOCAL_HEADER.size + fields[-2] + fields[-1]
+
+    def entry_view(self, entry):
+        """memoryview of an entry's raw (possibly deflated) bytes."""
+        start = self.data_offset(entry)
+        view = self._view[start:start + entry["csize"]]
+        if len(view) != entry["csize"]:
+            view.release()
+            raise zipfile.BadZipFile(f"Truncated data for {entry['name']}")
+        return view
+
+    def open_stored_entry(self, entry):
+        if entry["method"] != zipfile.ZIP_STORED:
+            raise ValueError(f"{entry['name']} is not a stored entry")
+        return ViewFile(self.entry_view(entry))
+
+    def copy_entry(self, entry, out, chunk_size=ENTRY_CHUNK_SIZE):
+        """Write an entry's decompressed bytes to out, inflating straight from the mapping."""
+        method = entry["method"]
+        if method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            raise zipfile.BadZipFile(f"Unsupported compression {method} for {entry['name']}")
+
+        view = self.entry_view(entry)
+        crc = 0
+        try:
+            if method == zipfile.ZIP_STORED:
+                for pos in range(0, len(view), chunk_size):
+                    chunk = view[pos:pos + chunk_size]
+                    crc = zlib.crc32(chunk, crc)
+                    out.write(chunk)
+            else:
+                decompressor = zlib.decompressobj(-15)
+                for pos in range(0, len(view), chunk_size):
+                    chunk = decompressor.decompress(view[pos:pos + chunk_size], chunk_size)
+                    while chunk:
+                        crc = zlib.crc32(chunk, crc)
+                        out.write(chunk)
+                        chunk = decompressor.decompress(decompressor.unconsumed_tail, chunk_size)
+                chunk = decompressor.flush()
+                if chunk:
+                    crc = zlib.crc32(chunk, crc)
+                    out.write(chunk)
+        finally:
+            view.release()
+
+        if crc & 0xFFFFFFFF != entry["crc"]:
+            raise zipfile.BadZipFile(f"Bad CRC-32 for {entry['name']}")
+
+    def close(self):
+        try:
+            self._view.release()
+            self._mmap.close()
+        except BufferError:
+            # A slice is still open somewhere; the mapping goes away with its last reference.
+            logger.warning("Repo zip mapping still in use; leaving it to be released later")
+
+_mapped = None
+_mapped_lock = threading.Lock()
+
+def get_mapped_repo(path=REPO_ZIP_PATH):
+    """Process-wide mapping of the repo zip, remapped when the file changed; None if it cannot be mapped."""
+    global _mapped
+    with _mapped_lock:
+        try:
+            st = os.stat(path)
+            if _mapped is not None and (_mapped.path != path or _mapped.key != (st.st_size, st.st_mtime_ns)):
+                _mapped.close()
+                _mapped = None
+            if _mapped is None:
+                _mapped = MappedZip(path)
+            return _mapped
+        except (OSError, ValueError, OverflowError) as e:
+            logger.warning("Could not map %s (%s); reading it through file I/O", path, e)
+            return None
+
+def close_mapped_repo():
+    """Unmap the repo zip (Windows will not delete or truncate a mapped file)."""
+    global _mapped
+    with _mapped_lock:
+        if _mapped is not None:
+            _mapped.close()
+            _mapped = None
@@ -0,0 +1,122 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import requests
+import http_session
+from config import HTTP_CACHE_DIR
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# How long a response is reused in-process before it is revalidated with the server.
+DEFAULT_TTL = 300
+
+_memo = {}
+_memo_lock = threading.Lock()
+_url_locks = {}
+
+stats = {
+    "memo_hits": 0,
+    "not_modified": 0,
+    "misses": 0,
+    "stale_fallbacks": 0,
+    "bytes_saved": 0,
+}
+_stats_lock = threading.Lock()
+
+def _count(name, amount=1):
+    with _stats_lock:
+        stats[name] += amount
+
+def _cache_key(url, headers):
+    return url + "|" + "|".join(f"{k}={v}" for k, v in sorted((headers or {}).items()))
+
+def _cache_path(key):
+    return os.path.join(HTTP_CACHE_DIR, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json")
+
+def _read_cache(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning("Ignoring unreadable cache entry %s: %s", path, e)
+        return None
+
+def _write_cache(path, entry):
+    tmp_path = path + ".tmp"
+    try:
+        os.makedirs(HTTP_CACHE_DIR, exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.error("Failed to write cache entry %s: %s", path, e)
+
+def _lock_for(key):
+    with _memo_lock:
+        return _url_locks.setdefault(key, threading.Lock())
+
+def get_json(url, headers=None, ttl=DEFAULT_TTL, timeout=10):
+    """
+    GET a JSON metadata endpoint through the in-process memo and the on-disk cache.
+    Cached responses are revalidated with If-None-Match/If-Modified-Since; a 304
+    reuses the cached body. Falls back to the cached body if the request fails.
+    """
+    key = _cache_key(url, headers)
+    with _lock_for(key):
+        now = time.monotonic()
+        with _memo_lock:
+            memo = _memo.get(key)
+        if memo and memo[0] > now:
+            _count("memo_hits")
+            return memo[1]
+
+        path = _cache_path(key)
+        cached = _read_cache(path)
+        request_headers = dict(headers or {})
+        if cached:
+            if cached.get("etag"):
+                request_headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                request_headers["If-Modified-Since"] = cached["last_modified"]
+
+        try:
+            resp = http_session.get(url, headers=request_headers, timeout=timeout)
+            if resp.status_code == 304 and cached:
+                body = cached["body"]
+                _count("not_modified")
+                _count("bytes_saved", len(body.encode("utf-8")))
+            else:
+                resp.raise_for_status()
+                body = resp.text
+                _count("misses")
+                _write_cache(path, {
+                    "url": url,
+                    "etag": resp.headers.get("ETag"),
+                    "last_modified": resp.headers.get("Last-Modified"),
+                    "body": body,
+                })
+        except requests.RequestException as e:
+            if not cached:
+                raise
+            logger.warning("Request to %s failed (%s); using cached response", url, e)
+            body = cached["body"]
+            _count("stale_fallbacks")
+
+        value = json.loads(body)
+        with _memo_lock:
+            _memo[key] = (time.monotonic() + ttl, value)
+        return value
+
+def log_stats():
+    with _stats_lock:
+        snapshot = dict(stats)
+    logger.info(
+        "Metadata cache: %d memo hits, %d not modified, %d misses, %d stale fallbacks, %d bytes saved",
+        snapshot["memo_hits"], snapshot["not_modified"], snapshot["misses"],
+        snapshot["stale_fallbacks"], snapshot["bytes_saved"],
+    )
@@ -0,0 +1,197 @@
+import os
+import json
+import time
+import bisect
+import threading
+import functools
+import contextlib
+from config import LOG_DIR
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+METRICS_FILE = os.path.join(LOG_DIR, "metrics.json")
+
+# Histogram bucket upper bounds; timers record milliseconds.
+BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+_enabled = False
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_started = time.time()
+
+class _Histogram:
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.buckets[bisect.bisect_left(BUCKETS, value)] += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding quantile q (max for the overflow bucket)."""
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= rank:
+                return BUCKETS[i] if i < len(BUCKETS) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": round(self.total, 3),
+            "min": self.min,
+            "max": self.max,
+            "avg": round(self.total / self.count, 3) if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": {str(b): n for b, n in zip(BUCKETS + ("inf",), self.buckets) if n},
+        }
+
+def enable(flag=True):
+    global _enabled
+    _enabled = flag
+
+def is_enabled():
+    return _enabled
+
+def incr(name, value=1):
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def observe(name, value):
+    if not _enabled:
+        return
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = _Histogram()
+        histogram.add(value)
+
+class _Timer:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, (time.perf_counter() - self.started) * 1000)
+
+_NULL_TIMER = contextlib.nullcontext()
+
+def timer(name):
+    """Context manager recording the elapsed milliseconds of its block into histogram name."""
+    return _Timer(name) if _enabled else _NULL_TIMER
+
+def timed(name):
+    """Decorator form of timer()."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Timer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def snapshot():
+    with _lock:
+        return {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "uptime_seconds": round(time.time() - _started, 1),
+            "counters": dict(sorted(_counters.items())),
+            "histograms": {name: h.to_dict() for name, h in sorted(_histograms.items())},
+        }
+
+def write_snapshot(path=METRICS_FILE):
+    tmp_path = path + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot(), f, indent=1)
+        os.replace(tmp_path, path)
+        return True
+    except Exception as e:
+        logger.error("Failed to write metrics %s: %s", path, e)
+        return False
+
+# ---------- Reporting ----------
+
+_flusher = None
+_server = None
+
+def _flush_loop(stop, interval, path):
+    while not stop.wait(interval):
+        write_snapshot(path)
+    write_snapshot(path)
+
+def _serve(port):
+    import http.server
+
+    class MetricsHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") not in ("", "/metrics"):
+                self.send_error(404)
+                return
+            body = json.dumps(snapshot()).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    # Bound to loopback only: the metrics are for local inspection, never for the network.
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info("Metrics endpoint on http://127.0.0.1:%d/metrics", server.server_port)
+    return server
+
+def start_metrics(flush_interval=60, http_port=0, path=METRICS_FILE):
+    """Enable collection, flush a JSON snapshot to path every flush_interval seconds and optionally serve it."""
+    global _flusher, _server
+    enable()
+    if _flusher is None:
+        stop = threading.Event()
+        thread = threading.Thread(target=_flush_loop, args=(stop, flush_interval, path), name="metrics-flush", daemon=True)
+        thread.start()
+        _flusher = (stop, thread)
+    if http_port and _server is None:
+        try:
+            _server = _serve(http_port)
+        except OSError as e:
+            logger.error("Metrics endpoint failed to start on port %s: %s", http_port, e)
+    return _server
+
+def stop_metrics():
+    """Stop reporting and write a final snapshot."""
+    global _flusher, _server
+    if _server is not None:
+        _server.shutdown()
+        _server = None
+    if _flusher is not None:
+        stop, thread = _flusher
+        stop.set()
+        thread.join(5)
+        _flusher = None
@@ -0,0 +1,68 @@
+import time
+import threading
+import concurrent.futures
+import metrics
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+def run_stages(name, stages, max_workers=None):
+    """
+    Run a dependency graph of stages concurrently.
+    stages is a list of (stage_name, func, deps); each func is called with the dict of
+    results so far once all of its deps have finished. A stage that raises is logged
+    and yields None; SystemExit/KeyboardInterrupt stop the graph and are re-raised.
+    Returns {stage_name: result} and logs per-stage and total timings.
+    """
+    pending = {stage_name: (func, tuple(deps)) for stage_name, func, deps in stages}
+    for stage_name, (_, deps) in pending.items():
+        missing = [d for d in deps if d not in pending]
+        if missing:
+            raise ValueError(f"Stage {stage_name} depends on unknown stages {missing}")
+
+    results = {}
+    timings = {}
+    fatal = []
+    lock = threading.Lock()
+    started = time.perf_counter()
+
+    def run(stage_name, func):
+        stage_started = time.perf_counter()
+        try:
+            with lock:
+                snapshot = dict(results)
+            return func(snapshot)
+        except Exception:
+            logger.exception("%s stage %s failed", name, stage_name)
+            return None
+        except BaseException as e:
+            fatal.append(e)
+            return None
+        finally:
+            timings[stage_name] = time.perf_counter() - stage_started
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers or len(pending) or 1,
+                                               thread_name_prefix=name) as pool:
+        running = {}
+        while (pending or running) and not fatal:
+            for stage_name in [s for s, (_, deps) in pending.items() if all(d in results for d in deps)]:
+                func, _ = pending.pop(stage_name)
+                running[pool.submit(run, stage_name, func)] = stage_name
+
+            if not running:
+                raise ValueError(f"Stages {sorted(pending)} have circular dependencies")
+
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                stage_name = running.pop(future)
+                with lock:
+                    results[stage_name] = future.result()
+                logger.info("%s stage %s finished in %.0f ms", name, stage_name, timings[stage_name] * 1000)
+                metrics.observe(f"{name}.{stage_name}_ms", timings[stage_name] * 1000)
+
+    if fatal:
+        raise fatal[0]
+
+    logger.info("%s finished in %.0f ms (sum of stages %.0f ms)", name,
+                (time.perf_counter() - started) * 1000, sum(timings.values()) * 1000)
+    return results
@@ -0,0 +1,318 @@
+import os
+import sys
+import abc
+import threading
+import collections
+import psutil
+import metrics
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+ProcessEvent = collections.namedtuple("ProcessEvent", ["kind", "name", "pid"])
+
+START = "start"
+STOP = "stop"
+
+SCAN_INTERVAL = 0.5
+# Consecutive backend failures after which the watcher switches to the psutil scanner.
+MAX_BACKEND_ERRORS = 3
+BACKEND_RETRY_INTERVAL = 5
+
+def _normalise(name):
+    return (name or "").replace("\\", "/").rsplit("/", 1)[-1].lower()
+
+# ---------- Backends ----------
+# A backend reports the watched processes that are running now (snapshot) and then
+# blocks in wait_events for up to timeout seconds, returning ProcessEvents.
+
+class _ScanBackend(abc.ABC):
+    """Diff-based scanner: lists PIDs cheaply and only resolves names for new PIDs."""
+
+    def __init__(self, names, interval=SCAN_INTERVAL):
+        self._names = {_normalise(n) for n in names}
+        self._interval = interval
+        self._known = {}
+        self._closed = threading.Event()
+
+    @abc.abstractmethod
+    def _list_pids(self):
+        """PIDs of every running process."""
+
+    @abc.abstractmethod
+    def _process_name(self, pid):
+        """Executable name of pid, or "" if it is gone or not accessible."""
+
+    @metrics.timed("watch.scan_ms")
+    def _scan(self):
+        events = []
+        pids = set(self._list_pids())
+        for pid in pids.difference(self._known):
+            name = _normalise(self._process_name(pid))
+            self._known[pid] = name
+            if name in self._names:
+                events.append(ProcessEvent(START, name, pid))
+        for pid in set(self._known).difference(pids):
+            name = self._known.pop(pid)
+            if name in self._names:
+                events.append(ProcessEvent(STOP, name, pid))
+        return events
+
+    def snapshot(self):
+        self._scan()
+        return {pid: name for pid, name in self._known.items() if name in self._names}
+
+    def wait_events(self, timeout):
+        if self._closed.wait(min(timeout, self._interval)):
+            return []
+        return self._scan()
+
+    def close(self):
+        self._closed.set()
+
+class PsutilBackend(_ScanBackend):
+    def _list_pids(self):
+        return psutil.pids()
+
+    def _process_name(self, pid):
+        try:
+            return psutil.Process(pid).name()
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return ""
+
+class ProcfsBackend(_ScanBackend):
+    """Linux scanner over /proc; matches the argv[0] basename so Wine processes are seen too."""
+
+    def __init__(self, names, interval=SCAN_INTERVAL, proc_root="/proc"):
+        super().__init__(names, interval)
+        self._proc_root = proc_root
+
+    def _list_pids(self):
+        return [int(entry) for entry in os.listdir(self._proc_root) if entry.isdigit()]
+
+    def _process_name(self, pid):
+        base = os.path.join(self._proc_root, str(pid))
+        try:
+            with open(os.path.join(base, "cmdline"), "rb") as f:
+                argv0 = f.read().split(b"\0", 1)[0].decode("utf-8", errors="ignore")
+            if argv0:
+                return argv0
+            with open(os.path.join(base, "comm"), "r", encoding="utf-8", errors="ignore") as f:
+                return f.read().strip()
+        except OSError:
+            return ""
+
+class WmiEventBackend:
+    """Windows backend using WMI creation/deletion event subscriptions (no polling of the process list)."""
+
+    def __init__(self, names, within=1):
+        import pythoncom
+        import wmi
+        self._pythoncom = pythoncom
+        self._wmi = wmi
+        self._names = {_normalise(n) for n in names}
+        self._within = within
+        self._connection = None
+        self._watchers = None
+        self._closed = threading.Event()
+
+    def _connect(self):
+        # WMI objects are apartment-bound, so they are created on the watcher thread.
+        if self._connection is None:
+            self._pythoncom.CoInitialize()
+            self._connection = self._wmi.WMI()
+            self._watchers = [
+                (kind, self._connection.Win32_Process.watch_for(notification_type, delay_secs=self._within))
+                for kind, notification_type in ((START, "Creation"), (STOP, "Deletion"))
+            ]
+        return self._connection
+
+    def snapshot(self):
+        connection = self._connect()
+        running = {}
+        for name in self._names:
+            for proc in connection.Win32_Process(Name=name):
+                running[proc.ProcessId] = name
+        return running
+
+    def wait_events(self, timeout):
+        self._connect()
+        events = []
+        per_watcher_ms = max(1, int(timeout * 1000 / len(self._watchers)))
+        for kind, watcher in self._watchers:
+            if self._closed.is_set():
+                break
+            try:
+                proc = watcher(timeout_ms=per_watcher_ms)
+            except self._wmi.x_wmi_timed_out:
+                continue
+            name = _normalise(proc.Name)
+            if name in self._names:
+                events.append(ProcessEvent(kind, name, proc.ProcessId))
+        return events
+
+    def close(self):
+        self._closed.set()
+
+class FakeBackend:
+    """In-memory backend for tests: call start()/stop() to simulate processes."""
+
+    def __init__(self, names=(), running=None):
+        self._running = dict(running or {})
+        self._events = collections.deque()
+        self._cond = threading.Condition()
+
+    def start(self, name, pid):
+        with self._cond:
+            self._running[pid] = _normalise(name)
+            self._events.append(ProcessEvent(START, _normalise(name), pid))
+            self._cond.notify_all()
+
+    def stop(self, pid):
+        with self._cond:
+            name = self._running.pop(pid)
+            self._events.append(ProcessEvent(STOP, name, pid))
+            self._cond.notify_all()
+
+    def snapshot(self):
+        with self._cond:
+            self._events.clear()
+            return dict(self._running)
+
+    def wait_events(self, timeout):
+        with self._cond:
+            if not self._events:
+                self._cond.wait(timeout)
+            events = list(self._events)
+            self._events.clear()
+            return events
+
+    def close(self):
+        with self._cond:
+            self._cond.notify_all()
+
+def create_backend(names):
+    """Pick the best backend for this platform, falling back to the psutil scanner."""
+    if sys.platform == "win32":
+        try:
+            return WmiEventBackend(names)
+        except Exception as e:
+            logger.warning("WMI event backend unavailable (%s); using psutil scanner", e)
+    elif sys.platform.startswith("linux") and os.path.isdir("/proc"):
+        return ProcfsBackend(names)
+    return PsutilBackend(names)
+
+# ---------- Watcher ----------
+
+class ProcessWatcher:
+    """Keeps the set of running PIDs per watched process name and emits start/stop events."""
+
+    def __init__(self, names, backend=None):
+        self._names = [_normalise(n) for n in names]
+        self._backend = backend or create_backend(names)
+        self._running = {name: set() for name in self._names}
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._ready = threading.Event()
+
+    def subscribe(self, callback):
+        """callback(event) runs on the watcher thread for every start/stop event."""
+        self._callbacks.append(callback)
+
+    def pids(self, name):
+        with self._lock:
+            return set(self._running.get(_normalise(name), ()))
+
+    def is_running(self, name):
+        return bool(self.pids(name))
+
+    def _apply(self, event):
+        with self._lock:
+            pids = self._running.setdefault(event.name, set())
+            if event.kind == START:
+                if event.pid in pids:
+                    return False
+                pids.add(event.pid)
+            else:
+                if event.pid not in pids:
+                    return False
+                pids.discard(event.pid)
+        return True
+
+    def _emit(self, event):
+        logger.info("Process %s: %s (pid %s)", event.kind, event.name, event.pid)
+        metrics.incr(f"watch.{event.kind}")
+        with metrics.timer("watch.callbacks_ms"):
+            for callback in list(self._callbacks):
+                try:
+                    callback(event)
+                except Exception:
+                    logger.exception("Process watch callback failed")
+
+    def _sync(self, running):
+        """Emit events turning the known PIDs into running ({pid: name})."""
+        with self._lock:
+            known = {pid: name for name, pids in self._running.items() for pid in pids}
+        events = [ProcessEvent(STOP, name, pid) for pid, name in known.items() if running.get(pid) != name]
+        events += [ProcessEvent(START, name, pid) for pid, name in running.items() if known.get(pid) != name]
+        for event in events:
+            if self._apply(event):
+                self._emit(event)
+
+    def _fall_back(self, error):
+        """Replace a failing backend (e.g. WMI that cannot connect) with the psutil scanner."""
+        logger.warning("%s failed (%s); using psutil scanner", type(self._backend).__name__, error)
+        try:
+            self._backend.close()
+        except Exception:
+            pass
+        self._backend = PsutilBackend(self._names)
+        if self._stop.is_set():
+            self._backend.close()
+        try:
+            self._sync(self._backend.snapshot())
+        except Exception:
+            logger.exception("Process snapshot failed")
+
+    def _run(self):
+        try:
+            self._sync(self._backend.snapshot())
+        except Exception as e:
+            if type(self._backend) is PsutilBackend:
+                logger.exception("Initial process snapshot failed")
+            else:
+                self._fall_back(e)
+        finally:
+            self._ready.set()
+
+        errors = 0
+        while not self._stop.is_set():
+            try:
+                events = self._backend.wait_events(1.0)
+            except Exception as e:
+                errors += 1
+                if errors >= MAX_BACKEND_ERRORS and type(self._backend) is not PsutilBackend:
+                    self._fall_back(e)
+                    errors = 0
+                    continue
+                logger.error("Process watch backend error: %s", e)
+                self._stop.wait(BACKEND_RETRY_INTERVAL)
+                continue
+            errors = 0
+            for event in events:
+                if self._apply(event):
+                    self._emit(event)
+        logger.info("Process watcher stopped")
+
+    def start(self, wait_ready=True):
+        self._thread = threading.Thread(target=self._run, name="process-watch", daemon=True)
+        self._thread.start()
+        if wait_ready:
+            self._ready.wait(10)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._backend.close()
@@ -0,0 +1,250 @@
+import io
+import os
+import bisect
+import threading
+import concurrent.futures
+import http_session
+import metrics
+from config import REMOTE_INDEX_PATH
+from repo_index import build_repo_index
+from staging import read_state, write_state
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# The end of central directory record plus the longest possible zip comment.
+TAIL_SIZE = 22 + 65535
+READAHEAD = 64 * 1024
+# Local headers are 30 bytes plus the name and an extra field we cannot see in the index.
+LOCAL_HEADER_SLACK = 30 + 1024
+# Entries whose byte ranges are at most this far apart are fetched in one request.
+COALESCE_GAP = 256 * 1024
+MAX_RANGE_SIZE = 32 * 1024 * 1024
+PREFETCH_BATCH_BYTES = 64 * 1024 * 1024
+INDEX_VERSION = 1
+
+class RangeNotSupported(IOError):
+    pass
+
+def coalesce_ranges(ranges, gap=COALESCE_GAP, max_size=MAX_RANGE_SIZE):
+    """Merge [start, end) ranges that overlap or lie within gap bytes of each other."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start - merged[-1][1] <= gap and end - merged[-1][0] <= max_size:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [tuple(r) for r in merged]
+
+class HttpRangeFile(io.RawIOBase):
+    """
+    Read-only, seekable file over a remote URL. Reads are served from byte ranges fetched
+    with HTTP Range requests; prefetch() pulls many ranges up front (coalesced, in parallel)
+    so that later reads do not go back to the network. Not shared between threads.
+    """
+
+    def __init__(self, url, size, etag=None, connections=4, on_mismatch=None):
+        super().__init__()
+        self.url = url
+        self.size = size
+        self.etag = etag
+        self._connections = connections
+        self._on_mismatch = on_mismatch
+        self._pos = 0
+        self._starts = []
+        self._segments = []
+        self.bytes_fetched = 0
+        self.requests = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if pos < 0:
+            raise ValueError("Negative seek position")
+        self._pos = pos
+        return pos
+
+    def _fetch(self, start, end):
+        """GET bytes [start, end) and return them."""
+        headers = {"Range": f"bytes={start}-{end - 1}", "Accept-Encoding": "identity"}
+        if self.etag:
+            headers["If-Range"] = self.etag
+        with metrics.timer("remote_zip.range_ms"):
+            # Streamed so that a full 200 response (file changed, range ignored) is never read.
+            response = http_session.get(self.url, headers=headers, stream=True, timeout=30)
+            try:
+                if response.status_code != 206:
+                    if self._on_mismatch is not None:
+                        self._on_mismatch()
+                    raise RangeNotSupported(f"Range request for {self.url} answered with HTTP {response.status_code}")
+                data = response.content
+            finally:
+                response.close()
+        if len(data) != end - start:
+            raise IOError(f"Range {start}-{end - 1} returned {len(data)} bytes")
+        self.requests += 1
+        self.bytes_fetched += len(data)
+        metrics.incr("remote_zip.bytes", len(data))
+        return data
+
+    def _add_segment(self, start, data):
+        i = bisect.bisect_left(self._starts, start)
+        self._starts.insert(i, start)
+        self._segments.insert(i, data)
+
+    def _cached(self, pos):
+        """(segment_start, data) of a fetched segment containing pos, or None."""
+        # Walk back from the nearest start: an earlier, longer segment may still cover pos.
+        for i in range(bisect.bisect_right(self._starts, pos) - 1, -1, -1):
+            start, data = self._starts[i], self._segments[i]
+            if pos < start + len(data):
+                return start, data
+        return None
+
+    def _drop_segments(self):
+        self._starts = []
+        self._segments = []
+
+    def prefetch(self, ranges):
+        """Fetch the given [start, end) ranges, coalesced, on up to `connections` parallel requests."""
+        wanted = [(max(0, s), min(self.size, e)) for s, e in ranges if s < self.size]
+        merged = coalesce_ranges(wanted)
+        if not merged:
+            return
+        workers = max(1, min(self._connections, len(merged)))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="remote-zip") as pool:
+            for (start, _), data in zip(merged, pool.map(lambda r: self._fetch(*r), merged)):
+                self._add_segment(start, data)
+
+    def prefetch_entries(self, entries):
+        self.prefetch([
+            (entry["offset"], entry["offset"] + LOCAL_HEADER_SLACK + len(entry["name"]) + entry["csize"])
+            for entry in entries
+        ])
+
+    def iter_prefetched(self, entries):
+        """
+        Yield entries after fetching them ahead in coalesced batches of about PREFETCH_BATCH_BYTES;
+        each batch is dropped once the next one is fetched, which bounds memory per handle.
+        """
+        i = 0
+        while i < len(entries):
+            batch = [entries[i]]
+            total = entries[i]["csize"]
+            i += 1
+            while i < len(entries) and total + entries[i]["csize"] <= PREFETCH_BATCH_BYTES:
+                total += entries[i]["csize"]
+                batch.append(entries[i])
+                i += 1
+            self._drop_segments()
+            self.prefetch_entries(batch)
+            yield from batch
+        self._drop_segments()
+
+    def read(self, size=-1):
+        remaining = max(self.size - self._pos, 0)
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        parts = []
+        while size > 0:
+            hit = self._cached(self._pos)
+            if hit is None:
+                end = min(self.size, self._pos + max(size, READAHEAD))
+                data = self._fetch(self._pos, end)
+                self._add_segment(self._pos, data)
+                hit = (self._pos, data)
+            start, data = hit
+            chunk = data[self._pos - start:self._pos - start + size]
+            parts.append(chunk)
+            self._pos += len(chunk)
+            size -= len(chunk)
+        return b"".join(parts)
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        self._drop_segments()
+        super().close()
+
+class RemoteZip:
+    """A skins repo zip read in place over HTTP instead of being downloaded in full."""
+
+    def __init__(self, url, connections=4):
+        self.url = url
+        self.connections = connections
+        response = http_session.head(url, allow_redirects=True, timeout=15)
+        response.raise_for_status()
+        length = response.headers.get("Content-Length")
+        if response.headers.get("Accept-Ranges", "").lower() != "bytes" or not (length and length.isdigit()):
+            raise RangeNotSupported(f"{url} does not support range requests")
+        # url stays the one asked for (the cache key); ranges go straight to the redirect target.
+        self.resolved_url = response.url or url
+        self.size = int(length)
+        self.etag = response.headers.get("ETag") or response.headers.get("Last-Modified")
+        self.stale = False
+
+    def _mark_stale(self):
+        self.stale = True
+
+    def open(self):
+        """A new handle; give each thread its own."""
+        return HttpRangeFile(self.resolved_url, self.size, self.etag, self.connections, self._mark_stale)
+
+    def _key(self):
+        return {"url": self.url, "size": self.size, "etag": self.etag}
+
+    def load_index(self, index_path=REMOTE_INDEX_PATH):
+        """Champion -> skin entries index, from the central directory at the end of the remote file."""
+        key = self._key()
+        data = read_state(index_path)
+        if data is not None and data.get("version") == INDEX_VERSION and data.get("remote") == key and self.etag:
+            logger.info("Loaded remote repo index from %s", index_path)
+            return data["champions"]
+
+        with self.open() as handle:
+            handle.prefetch([(max(0, self.size - TAIL_SIZE), self.size)])
+            champions = build_repo_index(handle)
+            logger.info("Built remote repo index from %d bytes in %d requests", handle.bytes_fetched, handle.requests)
+
+        try:
+            os.makedirs(os.path.dirname(index_path), exist_ok=True)
+            write_state(index_path, {"version": INDEX_VERSION, "remote": key, "champions": champions})
+        except Exception as e:
+            logger.error("Failed to write remote index %s: %s", index_path, e)
+        return champions
+
+_remote = None
+_remote_lock = threading.Lock()
+
+def open_remote_repo(url, connections=4):
+    """
+    Shared RemoteZip for url, or None if the server cannot serve ranges. It is opened
+    again (new size and ETag) once a range request found the remote file changed.
+    """
+    global _remote
+    with _remote_lock:
+        if _remote is None or _remote.url != url or _remote.stale:
+            try:
+                _remote = RemoteZip(url, connections)
+            except Exception as e:
+                logger.warning("Remote repo access unavailable (%s); falling back to a full download", e)
+                return None
+        return _remote
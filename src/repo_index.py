@@ -0,0 +1,211 @@
+import os
+import io
+import json
+import struct
+import threading
+import zipfile
+import zlib
+from config import REPO_ZIP_PATH, REPO_INDEX_PATH
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+REPO_PREFIX = "lol-skins-main/skins/"
+INDEX_VERSION = 1
+ENTRY_CHUNK_SIZE = 1024 * 1024
+
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+_LOCAL_HEADER_SIG = b"PK\x03\x04"
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+def _zip_key(zip_path):
+    st = os.stat(zip_path)
+    return {"size": st.st_size, "mtime": st.st_mtime_ns}
+
+def build_repo_index(zip_path=REPO_ZIP_PATH):
+    """Parse the repo zip central directory once into champion -> skin entries."""
+    champions = {}
+    with zipfile.ZipFile(zip_path) as repo_zip:
+        for info in repo_zip.infolist():
+            name = info.filename
+            if not name.startswith(REPO_PREFIX) or not name.endswith('.zip'):
+                continue
+
+            relative = name[len(REPO_PREFIX):]
+            parts = relative.split('/')
+            if len(parts) != 2:
+                continue
+
+            champion, filename = parts
+            champions.setdefault(champion, []).append({
+                "name": name,
+                "skin": os.path.splitext(filename)[0],
+                "chroma": 'chromas' in filename.casefold(),
+                "offset": info.header_offset,
+                "method": info.compress_type,
+                "csize": info.compress_size,
+                "size": info.file_size,
+                "crc": info.CRC,
+            })
+    return champions
+
+def _read_index_file(path, key):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning("Ignoring unreadable repo index %s: %s", path, e)
+        return None
+
+    if data.get("version") != INDEX_VERSION or data.get("zip") != key:
+        return None
+    return data.get("champions")
+
+def _write_index_file(path, key, champions):
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": INDEX_VERSION, "zip": key, "champions": champions}, f)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.error("Failed to write repo index %s: %s", path, e)
+
+def load_repo_index(zip_path=REPO_ZIP_PATH, index_path=None):
+    """
+    Return the champion -> skin entries index for zip_path.
+    Reuses the in-process copy or the index persisted next to the zip when the
+    zip size/mtime still match, and only parses the central directory otherwise.
+    """
+    if index_path is None:
+        index_path = REPO_INDEX_PATH if zip_path == REPO_ZIP_PATH else zip_path + ".index.json"
+
+    key = _zip_key(zip_path)
+    with _cache_lock:
+        cached = _cache.get(zip_path)
+        if cached and cached[0] == key:
+            return cached[1]
+
+        champions = _read_index_file(index_path, key)
+        if champions is None:
+            logger.info("Building repo index for %s", zip_path)
+            champions = build_repo_index(zip_path)
+            _write_index_file(index_path, key, champions)
+        else:
+            logger.info("Loaded repo index from %s", index_path)
+
+        _cache[zip_path] = (key, champions)
+        return champions
+
+def entry_data_offset(fp, entry):
+    """Return the absolute offset of an entry's data by reading its local header."""
+    fp.seek(entry["offset"])
+    header = fp.read(_LOCAL_HEADER.size)
+    if len(header) != _LOCAL_HEADER.size:
+        raise zipfile.BadZipFile(f"Truncated local header for {entry['name']}")
+    fields = _LOCAL_HEADER.unpack(header)
+    if fields[0] != _LOCAL_HEADER_SIG:
+        raise zipfile.BadZipFile(f"Bad local header signature for {entry['name']}")
+    name_len, extra_len = fields[-2], fields[-1]
+    return entry["offset"] + _LOCAL_HEADER.size + name_len + extra_len
+
+class EntrySlice(io.RawIOBase):
+    """Read-only, seekable window over a stored entry's bytes in the outer archive."""
+
+    def __init__(self, fp, start, length):
+        super().__init__()
+        self._fp = fp
+        self._start = start
+        self._length = length
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self._length + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if pos < 0:
+            raise ValueError("Negative seek position")
+        self._pos = pos
+        return pos
+
+    def read(self, size=-1):
+        remaining = max(self._length - self._pos, 0)
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        if size == 0:
+            return b""
+        self._fp.seek(self._start + self._pos)
+        data = self._fp.read(size)
+        self._pos += len(data)
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+def open_stored_entry(fp, entry):
+    """Return a seekable view of a stored (uncompressed) entry without copying it."""
+    if hasattr(fp, "open_stored_entry"):
+        # mapped_zip.MappedZip slices its mapping instead of seeking a shared position.
+        return fp.open_stored_entry(entry)
+    if entry["method"] != zipfile.ZIP_STORED:
+        raise ValueError(f"{entry['name']} is not a stored entry")
+    return EntrySlice(fp, entry_data_offset(fp, entry), entry["csize"])
+
+def copy_entry(fp, entry, out, chunk_size=ENTRY_CHUNK_SIZE):
+    """Stream an entry's decompressed bytes into out in bounded chunks, checking its CRC."""
+    if hasattr(fp, "copy_entry"):
+        return fp.copy_entry(entry, out, chunk_size)
+    method = entry["method"]
+    if method == zipfile.ZIP_DEFLATED:
+        decompressor = zlib.decompressobj(-15)
+    elif method == zipfile.ZIP_STORED:
+        decompressor = None
+    else:
+        raise zipfile.BadZipFile(f"Unsupported compression {method} for {entry['name']}")
+
+    position = entry_data_offset(fp, entry)
+    remaining = entry["csize"]
+    crc = 0
+    while remaining > 0:
+        fp.seek(position)
+        chunk = fp.read(min(chunk_size, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f"Truncated data for {entry['name']}")
+        position += len(chunk)
+        remaining -= len(chunk)
+        if decompressor is not None:
+            chunk = decompressor.decompress(chunk, chunk_size)
+            while chunk:
+                crc = zlib.crc32(chunk, crc)
+                out.write(chunk)
+                chunk = decompressor.decompress(decompressor.unconsumed_tail, chunk_size)
+        else:
+            crc = zlib.crc32(chunk, crc)
+            out.write(chunk)
+
+    if decompressor is not None:
+        tail = decompressor.flush()
+        crc = zlib.crc32(tail, crc)
+        out.write(tail)
+
+    if crc & 0xFFFFFFFF != entry["crc"]:
+        raise zipfile.BadZipFile(f"Bad CRC-32 for {entry['name']}")
@@ -0,0 +1,177 @@
+import os
+import re
+import shutil
+import zipfile
+import urllib.parse
+import concurrent.futures
+import http_session
+import metrics
+from config import (
+    REPO_ZIP_PATH, REPO_PATCH_DIR, REPO_PATCH_STATE_FILE, SKINS_REPO_COMPARE_URL, SKINS_REPO_RAW_URL
+)
+from repo_index import REPO_PREFIX
+from staging import read_state, write_state, remove_file
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Top level folder of the GitHub archive ("lol-skins-main/"); compare paths are relative to it.
+ARCHIVE_ROOT = REPO_PREFIX.split("/", 1)[0] + "/"
+# Above this share of unreachable bytes (replaced or removed entries) the zip is downloaded afresh.
+MAX_DEAD_RATIO = 0.25
+# The compare API lists at most this many files; a full list may be truncated.
+COMPARE_FILE_LIMIT = 300
+COPY_CHUNK_SIZE = 1024 * 1024
+
+_SHA_RE = re.compile(r"^[0-9a-f]{40}$")
+
+def repo_zip_commit(zip_path=REPO_ZIP_PATH):
+    """Commit SHA a repo zip was built from (GitHub archives carry it as the zip comment), or None."""
+    try:
+        with zipfile.ZipFile(zip_path) as repo_zip:
+            comment = repo_zip.comment.decode("ascii", "ignore").strip()
+    except (OSError, zipfile.BadZipFile):
+        return None
+    return comment if _SHA_RE.match(comment) else None
+
+def fetch_compare(base, head, compare_url=SKINS_REPO_COMPARE_URL):
+    headers = {"Accept": "application/vnd.github+json"}
+    resp = http_session.get(compare_url.format(base=base, head=head), headers=headers, timeout=15)
+    resp.raise_for_status()
+    return resp.json()
+
+def plan_repo_patch(compare, max_files):
+    """
+    Turn a compare API response into (writes, removes) of skins/ paths, or None when the
+    change cannot be applied as a patch (history rewritten, too many or truncated files).
+    """
+    if compare.get("status") not in ("ahead", "identical"):
+        logger.info("Repo history is %s relative to the local zip", compare.get("status"))
+        return None
+    files = compare.get("files") or []
+    if len(files) >= COMPARE_FILE_LIMIT:
+        logger.info("Repo diff lists %d+ files; too large to patch", len(files))
+        return None
+
+    skins_dir = REPO_PREFIX[len(ARCHIVE_ROOT):]
+    writes = []
+    removes = []
+    for f in files:
+        path = f.get("filename", "")
+        status = f.get("status")
+        previous = f.get("previous_filename")
+        if previous and previous.startswith(skins_dir) and previous != path:
+            removes.append(previous)
+        if not path.startswith(skins_dir):
+            continue
+        if status == "removed":
+            removes.append(path)
+        elif status != "unchanged":
+            writes.append(path)
+    if len(writes) + len(removes) > max_files:
+        logger.info("Repo diff changes %d skin files (limit %d); too large to patch",
+                    len(writes) + len(removes), max_files)
+        return None
+    return writes, removes
+
+def _dead_bytes(repo_zip, drop):
+    """Bytes before the central directory not used by any entry that survives the patch."""
+    live = 0
+    for info in repo_zip.infolist():
+        if info.filename not in drop:
+            live += 30 + len(info.filename.encode("utf-8")) + len(info.extra) + info.compress_size
+    return max(repo_zip.start_dir - live, 0)
+
+def _fetch_file(raw_url, head, path, dest):
+    url = raw_url.format(sha=head, path=urllib.parse.quote(path))
+    resp = http_session.get(url, stream=True, timeout=30)
+    try:
+        resp.raise_for_status()
+        with open(dest, 'wb') as f:
+            for chunk in resp.iter_content(COPY_CHUNK_SIZE):
+                f.write(chunk)
+    finally:
+        resp.close()
+    # Skins are zips; anything else (an error page, an LFS pointer) means the patch cannot be trusted.
+    if not zipfile.is_zipfile(dest):
+        raise zipfile.BadZipFile(f"{path} at {head} is not a zip")
+    return os.path.getsize(dest)
+
+def recover_repo_patch(zip_path=REPO_ZIP_PATH, state_path=REPO_PATCH_STATE_FILE):
+    """A patch interrupted while rewriting the central directory leaves a broken zip; drop it."""
+    if read_state(state_path) is None:
+        return False
+    logger.warning("Discarding repo zip left by an interrupted patch")
+    remove_file(zip_path)
+    remove_file(state_path)
+    shutil.rmtree(REPO_PATCH_DIR, ignore_errors=True)
+    return True
+
+@metrics.timed("update.repo_patch_ms")
+def patch_repo_zip(head, zip_path=REPO_ZIP_PATH, max_files=200, workers=4,
+                   compare_url=SKINS_REPO_COMPARE_URL, raw_url=SKINS_REPO_RAW_URL):
+    """
+    Bring the downloaded repo zip to commit head by fetching only the skin files changed
+    since the commit it was built from. Changed files are appended, replaced and removed
+    entries are dropped from the central directory (their bytes stay behind until the
+    next full download) and the zip comment is set to head, so unchanged entries keep
+    their offsets. Returns True when the zip is at head, False when a full download is needed.
+    """
+    recover_repo_patch(zip_path)
+    base = repo_zip_commit(zip_path)
+    if base is None:
+        logger.info("Repo zip has no commit to patch from")
+        return False
+    if base == head:
+        return True
+
+    try:
+        plan = plan_repo_patch(fetch_compare(base, head, compare_url), max_files)
+    except Exception as e:
+        logger.warning("Repo compare %s...%s failed: %s", base[:7], head[:7], e)
+        return False
+    if plan is None:
+        return False
+    writes, removes = plan
+
+    shutil.rmtree(REPO_PATCH_DIR, ignore_errors=True)
+    os.makedirs(REPO_PATCH_DIR)
+    try:
+        with zipfile.ZipFile(zip_path) as repo_zip:
+            drop = {ARCHIVE_ROOT + path for path in writes + removes}
+            dead = _dead_bytes(repo_zip, drop)
+            if dead > MAX_DEAD_RATIO * max(repo_zip.start_dir, 1):
+                logger.info("Repo zip would carry %.1f MiB of replaced entries; downloading afresh",
+                            dead / (1024 * 1024))
+                return False
+
+        fetched = 0
+        local = {path: os.path.join(REPO_PATCH_DIR, f"{i}.zip") for i, path in enumerate(writes)}
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers),
+                                                       thread_name_prefix="repo-patch") as pool:
+                for size in pool.map(lambda path: _fetch_file(raw_url, head, path, local[path]), writes):
+                    fetched += size
+        except Exception as e:
+            logger.warning("Fetching changed skins failed: %s", e)
+            return False
+
+        # From here on the central directory is rewritten; a crash leaves the marker behind.
+        write_state(REPO_PATCH_STATE_FILE, {"base": base, "head": head})
+        with zipfile.ZipFile(zip_path, 'a') as repo_zip:
+            for name in drop:
+                info = repo_zip.NameToInfo.pop(name, None)
+                if info is not None:
+                    repo_zip.filelist.remove(info)
+            for path in writes:
+                # Stored like the archive's own skin zips, so they can be read without inflating.
+                repo_zip.write(local[path], ARCHIVE_ROOT + path, compress_type=zipfile.ZIP_STORED)
+            repo_zip.comment = head.encode("ascii")
+        remove_file(REPO_PATCH_STATE_FILE)
+
+        metrics.incr("update.repo_patch_bytes", fetched)
+        logger.info("Patched repo zip %s -> %s: %d skins fetched (%.1f MiB), %d removed",
+                    base[:7], head[:7], len(writes), fetched / (1024 * 1024), len(removes))
+        return True
+    finally:
+        shutil.rmtree(REPO_PATCH_DIR, ignore_errors=True)
@@ -0,0 +1,122 @@
+import os
+import json
+import argparse
+import threading
+from config import SETTINGS_FILE
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+DEFAULT_SETTINGS = {
+    # 0 picks a worker count from the CPU count; 1 installs champions one at a time.
+    "install_workers": 0,
+    # "thread" or "process"
+    "install_executor": "thread",
+    # Concurrent range requests used for the skins repo download when the server allows it.
+    "download_connections": 4,
+    # Log rotation: "size" (log_max_bytes per file) or "time" (daily), keeping log_backup_count files.
+    "log_rotation": "size",
+    "log_max_bytes": 5 * 1024 * 1024,
+    "log_backup_count": 3,
+    # Log one line per installed skin instead of one summary line per champion.
+    "log_each_skin": False,
+    # Extract each skin beside installed/ and rename it into place (manager updates are always staged).
+    "staged_install": True,
+    # Which skins to keep installed: "all", "list" (install_champions) or "on_demand"
+    # (the champion seen in champ select or in game, installed when it is detected).
+    "install_scope": "all",
+    "install_champions": [],
+    # Endpoints polled for the current champion; lcu_url is found from the client process when unset.
+    "live_client_url": "https://127.0.0.1:2999",
+    "lcu_url": None,
+    "champion_poll_interval": 2,
+    # Counters and timings flushed to logs/metrics.json; metrics_http_port > 0 also serves
+    # them on http://127.0.0.1:<port>/metrics.
+    "metrics_enabled": False,
+    "metrics_flush_interval": 60,
+    "metrics_http_port": 0,
+    # Store identical skin files once under cslol-manager/blobs and hard link them into each skin.
+    "dedup_store": False,
+    # "folder" extracts every skin; "archive" keeps each skin's zip under cslol-manager/archives and
+    # extracts it in full only when it is enabled in a profile or its champion is detected.
+    # Skins enabled while the manager runs are expanded on its next start.
+    "install_layout": "folder",
+    # "remote" reads the skins repo zip in place with HTTP range requests (only the central
+    # directory and the skins being installed are fetched) instead of downloading it in full.
+    # Falls back to the download when the server does not support ranges.
+    "repo_source": "download",
+    "remote_repo_url": None,
+    # "patch" updates the downloaded skins repo zip to a new commit by fetching only the skin
+    # files the commit diff changed; "full" (and any diff over repo_patch_max_files) downloads
+    # the whole zip again.
+    "repo_refresh": "patch",
+    "repo_patch_max_files": 200,
+    # "file" reads the repo zip through a file handle per install worker; "mmap" maps it once
+    # and reads skins from the mapping, shared by all workers.
+    "repo_reader": "file",
+    # Log lazy import timings and time to tray against its target.
+    "startup_report": False,
+}
+
+_settings = None
+_settings_lock = threading.Lock()
+
+def load_settings():
+    """Load settings.json from DATA_DIR merged over the defaults (cached)."""
+    global _settings
+    with _settings_lock:
+        if _settings is None:
+            settings = dict(DEFAULT_SETTINGS)
+            try:
+                with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
+                    user_settings = json.load(f)
+                if isinstance(user_settings, dict):
+                    settings.update(user_settings)
+                else:
+                    logger.warning("Ignoring settings file that is not a JSON object: %s", SETTINGS_FILE)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.error("Failed to read settings %s: %s", SETTINGS_FILE, e)
+            _settings = settings
+        return _settings
+
+def use_settings(values):
+    """Replace this process's settings, e.g. with the parent's in a process pool worker."""
+    global _settings
+    with _settings_lock:
+        _settings = dict(values)
+
+def get_setting(name):
+    return load_settings().get(name, DEFAULT_SETTINGS.get(name))
+
+def apply_cli_args(argv=None):
+    """Override settings from command line flags; unknown flags are ignored."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--workers", type=int, dest="install_workers")
+    parser.add_argument("--executor", choices=("thread", "process"), dest="install_executor")
+    parser.add_argument("--scope", choices=("all", "list", "on_demand"), dest="install_scope")
+    parser.add_argument("--metrics", action="store_true", default=None, dest="metrics_enabled")
+    parser.add_argument("--layout", choices=("folder", "archive"), dest="install_layout")
+    parser.add_argument("--repo-source", choices=("download", "remote"), dest="repo_source")
+    parser.add_argument("--repo-refresh", choices=("patch", "full"), dest="repo_refresh")
+    parser.add_argument("--startup-report", action="store_true", default=None, dest="startup_report")
+    args, _ = parser.parse_known_args(argv)
+
+    settings = load_settings()
+    for name, value in vars(args).items():
+        if value is not None:
+            settings[name] = value
+            logger.info("Setting %s=%r from command line", name, value)
+    return settings
+
+def get_install_workers():
+    workers = get_setting("install_workers")
+    try:
+        workers = int(workers)
+    except (TypeError, ValueError):
+        logger.warning("Invalid install_workers %r; using automatic worker count", workers)
+        workers = 0
+    if workers <= 0:
+        workers = min(8, os.cpu_count() or 1)
+    return workers
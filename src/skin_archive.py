@@ -0,0 +1,135 @@
+import os
+import glob
+import shutil
+import zipfile
+from config import ARCHIVE_DIR, INSTALLED_DIR, INSTALLED_STAGING_DIR, PROFILES_DIR
+from repo_index import copy_entry
+from staging import new_staging_path, swap_in, read_state, write_state
+from blob_store import get_store
+from settings import get_setting
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Archive layout: the skin's inner zip is kept as ARCHIVE_DIR/<skin>.zip with a <skin>.json
+# sidecar, and installed/<skin> only holds META/ so CSLOL Manager can list the mod. The
+# rest is extracted when the skin is needed (in a profile, or its champion is detected).
+LAYOUT_FOLDER = "folder"
+LAYOUT_ARCHIVE = "archive"
+
+META_PREFIX = "META/"
+
+def archive_path(skin_name, archive_dir=ARCHIVE_DIR):
+    return os.path.join(archive_dir, skin_name + ".zip")
+
+def sidecar_path(skin_name, archive_dir=ARCHIVE_DIR):
+    return os.path.join(archive_dir, skin_name + ".json")
+
+def archive_fingerprint(skin_name, archive_dir=ARCHIVE_DIR):
+    """Fingerprint of an archived skin in the same shape as fingerprint.scan_skin_dir()."""
+    try:
+        st = os.stat(archive_path(skin_name, archive_dir))
+    except FileNotFoundError:
+        return None
+    return {"files": 1, "bytes": st.st_size, "mtime": st.st_mtime_ns}
+
+def read_sidecar(skin_name, archive_dir=ARCHIVE_DIR):
+    return read_state(sidecar_path(skin_name, archive_dir))
+
+def _extract_into_installed(skin_name, archive, members=None):
+    """Extract members (all if None) into a staging folder and swap it in as installed/<skin>."""
+    staged_path = new_staging_path(INSTALLED_STAGING_DIR, skin_name)
+    try:
+        os.makedirs(staged_path)
+        if members is None and get_setting("dedup_store"):
+            get_store().extract_all(archive, staged_path)
+        else:
+            archive.extractall(staged_path, members)
+        swap_in(staged_path, os.path.join(INSTALLED_DIR, skin_name))
+    finally:
+        if os.path.isdir(staged_path):
+            shutil.rmtree(staged_path, ignore_errors=True)
+
+def write_skin_archive(repo_file, entry):
+    """
+    Install one indexed skin in the archive layout: copy its inner zip out of the repo in a
+    single sequential write, then extract only META/ into installed/<skin>. The folder is
+    created even when the zip has no META/, since it marks the skin as installed.
+    """
+    skin_name = entry["skin"]
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    path = archive_path(skin_name)
+    tmp_path = path + ".part"
+    try:
+        with open(tmp_path, 'wb') as out:
+            copy_entry(repo_file, entry, out)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    with zipfile.ZipFile(path) as archive:
+        meta = [name for name in archive.namelist() if name.startswith(META_PREFIX)]
+        install_path = os.path.join(INSTALLED_DIR, skin_name)
+        if os.path.lexists(install_path):
+            _extract_into_installed(skin_name, archive, meta)
+        else:
+            # Nothing to replace, so the stub can be written in place without a staging swap.
+            os.makedirs(install_path)
+            archive.extractall(install_path, meta)
+
+    write_state(sidecar_path(skin_name), {
+        "skin": skin_name,
+        "entry": entry["name"],
+        "crc": entry["crc"],
+        "size": entry["size"],
+        "expanded": False,
+    })
+    return archive_fingerprint(skin_name)
+
+def expand_skin(skin_name):
+    """Extract an archived skin in full; returns False if it is not archived or already expanded."""
+    sidecar = read_sidecar(skin_name)
+    if sidecar is None or sidecar.get("expanded"):
+        return False
+    with zipfile.ZipFile(archive_path(skin_name)) as archive:
+        _extract_into_installed(skin_name, archive)
+    sidecar["expanded"] = True
+    write_state(sidecar_path(skin_name), sidecar)
+    return True
+
+def expand_skins(skin_names):
+    expanded = 0
+    for skin_name in skin_names:
+        try:
+            if expand_skin(skin_name):
+                expanded += 1
+        except Exception as e:
+            logger.error("Failed to expand archived skin %s: %s", skin_name, e)
+    if expanded:
+        logger.info("Expanded %d archived skins", expanded)
+    return expanded
+
+def remove_skin_archive(skin_name):
+    for path in (archive_path(skin_name), sidecar_path(skin_name)):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error("Failed to remove skin archive %s: %s", path, e)
+
+def profile_skins(profiles_dir=PROFILES_DIR):
+    """Mod names enabled in any CSLOL Manager profile (one name per line in *.profile)."""
+    names = set()
+    for path in glob.glob(os.path.join(profiles_dir, "*.profile")):
+        try:
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                names.update(line.strip() for line in f if line.strip())
+        except Exception as e:
+            logger.error("Failed to read profile %s: %s", path, e)
+    return names
+
+def expand_profile_skins():
+    """Make sure every archived skin enabled in a profile is fully extracted."""
+    return expand_skins(sorted(profile_skins()))
@@ -1,40 +1,232 @@
 import os
-import requests
+import json
 import time
+import zipfile
+import threading
+import concurrent.futures
+import requests
+import http_session
+import metrics
 from config import SKINS_REPO_URL, REPO_ZIP_PATH
+from settings import get_setting
 from logger import setup_logger
 
 logger = setup_logger(__name__)
 
-def download_repo():
-    """Download skins repository if missing"""
-    if not os.path.exists(REPO_ZIP_PATH):
-        logger.info("Downloading skins repository")
+CHUNK_SIZE = 256 * 1024
+MAX_RETRIES = 5
+RETRY_BASE_DELAY = 2
+RETRY_MAX_DELAY = 30
+MIN_SEGMENT_SIZE = 8 * 1024 * 1024
+STATE_SAVE_INTERVAL = 4 * 1024 * 1024
+
+class _ByteCounter:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def add(self, n):
+        with self._lock:
+            self.value += n
+
+def _load_state(state_path):
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+def _save_state(state_path, state):
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path)
+
+def _discard_partial(part_path, state_path):
+    for path in (part_path, state_path):
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except Exception as e:
+            logger.error("Failed to remove partial download %s: %s", path, e)
+
+def _probe(url):
+    """Return (size, etag, accepts_ranges) for url; size is None if unknown."""
+    try:
+        response = http_session.head(url, allow_redirects=True, timeout=15)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        logger.info("HEAD %s failed (%s); downloading without range support", url, e)
+        return None, None, False
+    length = response.headers.get("Content-Length")
+    size = int(length) if length and length.isdigit() else None
+    etag = response.headers.get("ETag") or response.headers.get("Last-Modified")
+    accepts_ranges = response.headers.get("Accept-Ranges", "").lower() == "bytes"
+    return size, etag, accepts_ranges
+
+def _download_stream(url, part_path, state_path, state, counter):
+    """Single connection download, resuming from the end of part_path with a Range request."""
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = {}
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+        if state.get("etag"):
+            headers["If-Range"] = state["etag"]
+
+    with http_session.get(url, headers=headers, stream=True, timeout=30) as response:
+        if response.status_code == 416 and offset:
+            logger.info("Server reports partial download already complete (%d bytes)", offset)
+            return
+        response.raise_for_status()
+        if offset and response.status_code != 206:
+            logger.info("Server ignored resume request; restarting download from scratch")
+            offset = 0
+        elif offset:
+            logger.info("Resuming download at %d bytes", offset)
+
+        _save_state(state_path, state)
+        with open(part_path, 'ab' if offset else 'wb') as f:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                f.write(chunk)
+                counter.add(len(chunk))
+
+def _download_segment(url, part_path, segment, etag, counter, on_progress):
+    start, end, done = segment
+    if start + done > end:
+        return
+    headers = {"Range": f"bytes={start + done}-{end}"}
+    if etag:
+        headers["If-Range"] = etag
+
+    with http_session.get(url, headers=headers, stream=True, timeout=30) as response:
+        response.raise_for_status()
+        if response.status_code != 206:
+            raise IOError(f"Server ignored range request for segment {start}-{end}")
+        with open(part_path, 'r+b') as f:
+            f.seek(start + done)
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                chunk = chunk[:end + 1 - (start + segment[2])]
+                if not chunk:
+                    break
+                f.write(chunk)
+                segment[2] += len(chunk)
+                counter.add(len(chunk))
+                on_progress()
+
+    if start + segment[2] <= end:
+        raise IOError(f"Segment {start}-{end} ended early at {start + segment[2]}")
+
+def _download_segmented(url, part_path, state_path, state, connections, counter):
+    """Download byte ranges of the file on concurrent connections into a preallocated part file."""
+    size = state["size"]
+    if not state.get("segments") or not os.path.exists(part_path):
+        segment_size = -(-size // connections)
+        state["segments"] = [
+            [start, min(start + segment_size, size) - 1, 0]
+            for start in range(0, size, segment_size)
+        ]
+        with open(part_path, 'wb') as f:
+            f.truncate(size)
+    else:
+        logger.info("Resuming segmented download (%d/%d bytes done)",
+                    sum(s[2] for s in state["segments"]), size)
+
+    lock = threading.Lock()
+    last_saved = [counter.value]
+
+    def on_progress():
+        with lock:
+            if counter.value - last_saved[0] >= STATE_SAVE_INTERVAL:
+                _save_state(state_path, state)
+                last_saved[0] = counter.value
+
+    _save_state(state_path, state)
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=connections, thread_name_prefix="repo-download") as pool:
+            futures = [
+                pool.submit(_download_segment, url, part_path, segment, state.get("etag"), counter, on_progress)
+                for segment in state["segments"]
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                future.result()
+    finally:
+        with lock:
+            _save_state(state_path, state)
+
+def _validate_zip(part_path, expected_size):
+    if expected_size is not None and os.path.getsize(part_path) != expected_size:
+        raise zipfile.BadZipFile(
+            f"Downloaded size {os.path.getsize(part_path)} does not match expected {expected_size}")
+    with zipfile.ZipFile(part_path) as repo_zip:
+        if not repo_zip.infolist():
+            raise zipfile.BadZipFile("Downloaded archive is empty")
+
+def download_repo(url=SKINS_REPO_URL, dest=REPO_ZIP_PATH, connections=None):
+    """
+    Download skins repository if missing.
+    Writes to dest + '.part', resumes it with Range requests, splits the file across
+    concurrent connections when the server supports ranges, and only renames it into
+    place once it opens as a zip.
+    """
+    if os.path.exists(dest):
+        return True
+
+    if connections is None:
+        connections = max(1, int(get_setting("download_connections") or 1))
+
+    part_path = dest + ".part"
+    state_path = part_path + ".json"
+    delay = RETRY_BASE_DELAY
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+
+    logger.info("Downloading skins repository")
+    for attempt in range(1, MAX_RETRIES + 1):
+        counter = _ByteCounter()
+        started = time.monotonic()
         try:
-            response = requests.get(SKINS_REPO_URL, stream=True, timeout=30)
-            response.raise_for_status()
-            with open(REPO_ZIP_PATH, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            logger.info("Repository download complete")
+            size, etag, accepts_ranges = _probe(url)
+            segmented = connections > 1 and accepts_ranges and size and size >= 2 * MIN_SEGMENT_SIZE
+            mode = "segmented" if segmented else "stream"
+
+            state = _load_state(state_path) if os.path.exists(part_path) else None
+            fresh = {"url": url, "etag": etag, "size": size, "mode": mode}
+            if not state or any(state.get(k) != v for k, v in fresh.items()):
+                if state is not None or os.path.exists(part_path):
+                    logger.info("Partial download is stale; starting over")
+                _discard_partial(part_path, state_path)
+                state = fresh
+
+            if segmented:
+                segments = min(connections, size // MIN_SEGMENT_SIZE)
+                _download_segmented(url, part_path, state_path, state, segments, counter)
+            else:
+                _download_stream(url, part_path, state_path, state, counter)
+
+            try:
+                _validate_zip(part_path, size)
+            except zipfile.BadZipFile:
+                _discard_partial(part_path, state_path)
+                raise
+
+            os.replace(part_path, dest)
+            _discard_partial(part_path, state_path)
+
+            elapsed = max(time.monotonic() - started, 1e-6)
+            metrics.observe("download.repo_ms", elapsed * 1000)
+            metrics.incr("download.bytes", counter.value)
+            logger.info("Repository download complete: %.1f MiB in %.1fs (%.2f MiB/s)",
+                        counter.value / (1024 * 1024), elapsed, counter.value / (1024 * 1024) / elapsed)
             return True
         except Exception as e:
-            logger.error(f"Repository download failed: {e}")
-            max_retries = 3
-            delay = 5 
-            attempt = 0
-            if attempt < max_retries - 1:
-                logger.warning(f"Download failed (attempt {attempt+1}/{max_retries}): {e}. Retrying in {delay} seconds...")
+            metrics.incr("download.errors")
+            if attempt < MAX_RETRIES:
+                logger.warning(f"Download failed (attempt {attempt}/{MAX_RETRIES}): {e}. Retrying in {delay} seconds...")
                 time.sleep(delay)
-                delay = min(delay * 2, 30) 
+                delay = min(delay * 2, RETRY_MAX_DELAY)
             else:
-                logger.error("Max retries exceeded for download")
-
-                if os.path.exists(REPO_ZIP_PATH):
-                    try:
-                        os.remove(REPO_ZIP_PATH)
-                        logger.info("Removed partial download: %s", REPO_ZIP_PATH)
-                    except Exception as e:
-                        logger.error("Failed to remove partial download: %s", e)
-                return False
-    return True
+                logger.error(f"Repository download failed: {e}")
+
+    logger.error("Max retries exceeded for download")
+    if os.path.exists(part_path):
+        logger.info("Keeping partial download for resume: %s", part_path)
+    return False
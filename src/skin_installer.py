@@ -1,52 +1,380 @@
 import os
-import io
+import sys
+import shutil
 import zipfile
-from config import INSTALL_DIR, DOWNLOAD_DIR, REPO_ZIP_PATH, INSTALLED_DIR
-from logger import setup_logger
+import tempfile
+import threading
+import contextlib
+import multiprocessing
+import concurrent.futures
+import psutil
+import metrics
+from config import (
+    REPO_ZIP_PATH, INSTALLED_DIR, INSTALLED_STAGING_DIR, INSTALL_JOURNAL_FILE
+)
+from repo_index import load_repo_index, open_stored_entry, copy_entry
+from mapped_zip import get_mapped_repo, close_mapped_repo
+from staging import new_staging_path, swap_in, clear_staging, append_journal, read_journal, remove_file
+from fingerprint import scan_skin_dir, verify_installed
+from blob_store import get_store
+from trash import after_purge
+from skin_archive import LAYOUT_ARCHIVE, write_skin_archive, remove_skin_archive
+from skin_manifest import load_manifest, save_manifest, plan_sync, record_skin, remove_skin_dir
+from manager_diff import file_crc32
+from settings import get_setting, load_settings, use_settings
+from logger import setup_logger, start_log_relay, forward_logs
 
 logger = setup_logger(__name__)
 
-def install_skins(champion, skip_chromas=False):
-    """Install skins directly from repository zip to CSLOL Manager"""
-    installed = 0
+# Deflated inner skin zips are inflated into memory up to this size, then spill to a temp file.
+SPOOL_MAX_BYTES = 16 * 1024 * 1024
+
+def peak_rss_bytes():
+    """Peak resident set size of this process so far, or None if unavailable."""
     try:
-        with zipfile.ZipFile(REPO_ZIP_PATH) as repo_zip:
-            base_prefix = f"lol-skins-main/skins/{champion}/"
-            skin_files = []
+        if sys.platform == 'win32':
+            return psutil.Process().memory_info().peak_wset
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except Exception:
+        return None
 
-            for f in repo_zip.namelist():
-                if not f.startswith(base_prefix):
-                    continue
-                if not f.endswith('.zip'):
-                    continue
+def _extract_archive(skin_archive, install_path, store):
+    if store is None:
+        skin_archive.extractall(install_path)
+        return 0
+    return store.extract_all(skin_archive, install_path)
 
-                relative = f[len(base_prefix):]
-                if '/' in relative:
-                    continue
+def extract_skin_entry(repo_file, entry, install_path, store=None):
+    """
+    Extract one inner skin zip without materialising it as a single bytes object.
+    With a blob store, files are linked from the store; returns the bytes that did not
+    have to be written.
+    """
+    if entry["method"] == zipfile.ZIP_STORED:
+        with open_stored_entry(repo_file, entry) as entry_file, zipfile.ZipFile(entry_file) as skin_archive:
+            return _extract_archive(skin_archive, install_path, store)
 
-                if skip_chromas and 'chromas' in relative.casefold():
-                    continue
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES, dir=os.path.dirname(REPO_ZIP_PATH)) as spool:
+        copy_entry(repo_file, entry, spool)
+        spool.seek(0)
+        with zipfile.ZipFile(spool) as skin_archive:
+            return _extract_archive(skin_archive, install_path, store)
 
-                skin_files.append(f)
+def select_skin_entries(index, champion, skip_chromas=False):
+    return [
+        entry for entry in index.get(champion, [])
+        if not (skip_chromas and entry["chroma"])
+    ]
 
-            if not skin_files:
-                logger.warning(f"No skins found for {champion}")
-                return 0
+def install_entries(champion, skin_entries, repo_file=None, source=None):
+    """
+    Extract the given indexed skin entries; returns the entries that were installed.
+    Entries are read from repo_file, else from a new handle on source (a remote_zip.RemoteZip),
+    else from the downloaded repo zip.
+    """
+    installed = []
+    log_each_skin = get_setting("log_each_skin")
+    staged = get_setting("staged_install")
+    store = get_store() if get_setting("dedup_store") else None
+    layout = get_setting("install_layout")
+    try:
+        with contextlib.ExitStack() as stack:
+            if repo_file is None:
+                repo_file = stack.enter_context(source.open() if source is not None else open(REPO_ZIP_PATH, 'rb'))
+
+            # Remote handles fetch the entries' byte ranges ahead of extraction.
+            if hasattr(repo_file, "iter_prefetched"):
+                skin_entries = repo_file.iter_prefetched(skin_entries)
 
-            for skin_path in skin_files:
-                skin_name = os.path.splitext(os.path.basename(skin_path))[0]
+            for entry in skin_entries:
+                skin_name = entry["skin"]
                 install_path = os.path.join(INSTALLED_DIR, skin_name)
 
-                os.makedirs(install_path, exist_ok=True)
+                if layout == LAYOUT_ARCHIVE:
+                    with metrics.timer("install.skin_ms"):
+                        fingerprint = write_skin_archive(repo_file, entry)
+                    installed.append(dict(entry, fingerprint=fingerprint, layout=layout))
+                    if log_each_skin:
+                        logger.info(f"Installed skin archive: {skin_name}")
+                    continue
 
-                with repo_zip.open(skin_path) as skin_zip:
-                    with zipfile.ZipFile(io.BytesIO(skin_zip.read())) as skin_archive:
-                        skin_archive.extractall(install_path)
+                with metrics.timer("install.skin_ms"):
+                    if staged:
+                        # Build the skin beside installed/ and rename it into place in one step.
+                        staged_path = new_staging_path(INSTALLED_STAGING_DIR, skin_name)
+                        try:
+                            os.makedirs(staged_path)
+                            saved = extract_skin_entry(repo_file, entry, staged_path, store)
+                            swap_in(staged_path, install_path)
+                        finally:
+                            if os.path.isdir(staged_path):
+                                shutil.rmtree(staged_path, ignore_errors=True)
+                    else:
+                        os.makedirs(install_path, exist_ok=True)
+                        saved = extract_skin_entry(repo_file, entry, install_path, store)
 
-                installed += 1
-                logger.info(f"Installed skin: {skin_name}")
+                installed.append(dict(entry, fingerprint=scan_skin_dir(install_path), dedup_saved=saved))
+                if log_each_skin:
+                    logger.info(f"Installed skin: {skin_name}")
 
     except Exception as e:
-        logger.error(f"Skin installation failed: {e}")
+        metrics.incr("install.errors")
+        logger.error(f"Skin installation failed for {champion}: {e}")
 
+    metrics.incr("install.skins", len(installed))
+    if installed and not log_each_skin:
+        logger.info("Installed %d skins for %s: %s", len(installed), champion,
+                    ", ".join(entry["skin"] for entry in installed))
     return installed
+
+@metrics.timed("install.champion_ms")
+def install_skins(champion, skip_chromas=False, index=None, repo_file=None, source=None):
+    """Install skins directly from repository zip to CSLOL Manager"""
+    try:
+        if index is None:
+            index = load_repo_index()
+
+        skin_entries = select_skin_entries(index, champion, skip_chromas)
+
+        if not skin_entries:
+            logger.warning(f"No skins found for {champion}")
+            return 0
+
+        return len(install_entries(champion, skin_entries, repo_file, source))
+
+    except Exception as e:
+        logger.error(f"Skin installation failed: {e}")
+        return 0
+
+# ---------- Parallel install ----------
+
+_worker_local = threading.local()
+_worker_files = []
+_worker_files_lock = threading.Lock()
+
+def _shared_repo_reader():
+    """The mapped repo zip (repo_reader "mmap"), shared by every worker of this process, or None."""
+    if get_setting("repo_reader") != "mmap":
+        return None
+    return get_mapped_repo()
+
+def _worker_repo_file():
+    """Per-worker handle on the repo zip so workers never share a file position."""
+    mapped = _shared_repo_reader()
+    if mapped is not None:
+        return mapped
+    repo_file = getattr(_worker_local, "repo_file", None)
+    if repo_file is None:
+        repo_file = open(REPO_ZIP_PATH, 'rb')
+        _worker_local.repo_file = repo_file
+        with _worker_files_lock:
+            _worker_files.append(repo_file)
+    return repo_file
+
+def _close_worker_files():
+    with _worker_files_lock:
+        for repo_file in _worker_files:
+            try:
+                repo_file.close()
+            except Exception:
+                pass
+        _worker_files.clear()
+    close_mapped_repo()
+
+def _init_process_worker(settings, log_queue):
+    # Spawned workers would reload settings.json and lose command line overrides.
+    use_settings(settings)
+    forward_logs(log_queue)
+
+def _install_in_worker(champion, skin_entries, source=None):
+    if source is not None:
+        return install_entries(champion, skin_entries, source=source)
+    return install_entries(champion, skin_entries, _worker_repo_file())
+
+def run_install_jobs(jobs, workers=1, executor="thread", source=None):
+    """
+    Run (champion, skin_entries) jobs, optionally on a pool of thread or process workers.
+    Yields (champion, installed_entries) in job order so progress is reported in order.
+    With a remote source, each job reads through its own range-request handle.
+    """
+    total = len(jobs)
+    workers = max(1, min(workers, total or 1))
+    logger.info("Installing skins for %d champions with %d %s worker(s)", total, workers, executor if workers > 1 else "inline")
+
+    champions = [champ for champ, _ in jobs]
+    skin_lists = [entries for _, entries in jobs]
+    log_relay = None
+    if workers == 1:
+        repo_file = _shared_repo_reader() if source is None else None
+        results = (install_entries(champ, entries, repo_file, source) for champ, entries in jobs)
+        pool = None
+    elif executor == "process":
+        log_queue = multiprocessing.Queue(-1)
+        log_relay = start_log_relay(log_queue)
+        pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_process_worker,
+            initargs=(dict(load_settings()), log_queue))
+        results = pool.map(_install_in_worker, champions, skin_lists, [source] * total)
+    else:
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="skin-install")
+        results = pool.map(_install_in_worker, champions, skin_lists, [source] * total)
+
+    try:
+        for i, (champ, installed) in enumerate(zip(champions, results), 1):
+            logger.info("Installed (%d/%d): %s (%d skins)", i, total, champ, len(installed))
+            yield champ, installed
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True)
+        if log_relay is not None:
+            log_relay.stop()
+        _close_worker_files()
+
+def install_champions(champions, skip_chromas=False, workers=1, executor="thread", index=None, source=None):
+    """Install every skin of every champion; returns the total number of installed skins."""
+    if index is None:
+        index = load_repo_index()
+
+    jobs = []
+    for champ in champions:
+        skin_entries = select_skin_entries(index, champ, skip_chromas)
+        if skin_entries:
+            jobs.append((champ, skin_entries))
+        else:
+            logger.warning(f"No skins found for {champ}")
+
+    return sum(len(installed) for _, installed in run_install_jobs(jobs, workers, executor, source))
+
+def _folder_matches(repo_file, entry, install_path):
+    """Whether install_path holds exactly the files of entry's inner zip (size and CRC32 of each)."""
+    with contextlib.ExitStack() as stack:
+        if entry["method"] == zipfile.ZIP_STORED:
+            entry_file = stack.enter_context(open_stored_entry(repo_file, entry))
+        else:
+            entry_file = stack.enter_context(
+                tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES, dir=os.path.dirname(REPO_ZIP_PATH)))
+            copy_entry(repo_file, entry, entry_file)
+            entry_file.seek(0)
+        members = [info for info in zipfile.ZipFile(entry_file).infolist() if not info.is_dir()]
+
+    fingerprint = scan_skin_dir(install_path)
+    if fingerprint is None or fingerprint["files"] != len(members):
+        return False
+    for info in members:
+        path = os.path.join(install_path, *info.filename.split("/"))
+        try:
+            if os.path.getsize(path) != info.file_size or file_crc32(path) != info.CRC:
+                return False
+        except OSError:
+            return False
+    return True
+
+def adopt_installed(manifest, index, champions, skip_chromas=False, repo_path=REPO_ZIP_PATH):
+    """
+    Record skin folders already in INSTALLED_DIR but missing from the manifest (installed
+    by a version without one) when every file matches the repo entry's size and CRC32, so
+    that upgrading does not re-extract the whole library. Returns the number adopted.
+    """
+    candidates = [
+        (champ, entry)
+        for champ in champions
+        for entry in select_skin_entries(index, champ, skip_chromas)
+        if entry["skin"] not in manifest and os.path.isdir(os.path.join(INSTALLED_DIR, entry["skin"]))
+    ]
+    if not candidates:
+        return 0
+
+    adopted = 0
+    with open(repo_path, 'rb') as repo_file:
+        for champ, entry in candidates:
+            install_path = os.path.join(INSTALLED_DIR, entry["skin"])
+            try:
+                if not _folder_matches(repo_file, entry, install_path):
+                    continue
+            except Exception as e:
+                logger.warning("Could not compare %s with the repo: %s", entry["skin"], e)
+                continue
+            record_skin(manifest, champ, dict(entry, fingerprint=scan_skin_dir(install_path)))
+            adopted += 1
+    logger.info("Adopted %d of %d skin folders already installed", adopted, len(candidates))
+    return adopted
+
+def sync_skins(champions, skip_chromas=False, workers=1, executor="thread", index=None, repair=None, prune=True,
+               source=None):
+    """
+    Bring INSTALLED_DIR in line with the repo zip using the installed manifest:
+    only skins whose source entry was added or changed (CRC32/size), or whose folder
+    fails fingerprint verification, are extracted, and with prune, skins outside the
+    given champions or no longer in the repo are deleted. Pass the index of a remote source
+    together with source to install from it. Returns (installed, removed, unchanged).
+    """
+    if index is None:
+        index = load_repo_index()
+
+    manifest = load_manifest()
+    replayed = read_journal(INSTALL_JOURNAL_FILE)
+    if replayed:
+        # Resume an interrupted sync: skins it finished are already swapped in.
+        for record in replayed:
+            manifest[record["skin"]] = record["record"]
+        logger.info("Resuming interrupted install: %d skins already done", len(replayed))
+    clear_staging(INSTALLED_STAGING_DIR)
+
+    layout = get_setting("install_layout")
+    if source is None and layout != LAYOUT_ARCHIVE:
+        adopt_installed(manifest, index, champions, skip_chromas)
+    if repair is None:
+        repair = verify_installed(manifest, INSTALLED_DIR)
+    plan = plan_sync(manifest, index, champions, skip_chromas, INSTALLED_DIR, repair, layout)
+    if not prune:
+        plan = plan._replace(removed=[])
+
+    for skin_name in plan.removed:
+        remove_skin_dir(os.path.join(INSTALLED_DIR, skin_name))
+        if manifest[skin_name].get("layout") == LAYOUT_ARCHIVE:
+            remove_skin_archive(skin_name)
+        manifest.pop(skin_name, None)
+        logger.info("Removed skin no longer in repo: %s", skin_name)
+
+    staged = get_setting("staged_install")
+    for champ, skin_entries in plan.jobs:
+        for entry in skin_entries:
+            if entry["skin"] in manifest:
+                if manifest[entry["skin"]].get("layout") == LAYOUT_ARCHIVE and layout != LAYOUT_ARCHIVE:
+                    remove_skin_archive(entry["skin"])
+                if not staged:
+                    # Changed entry: clear stale files before re-extracting.
+                    remove_skin_dir(os.path.join(INSTALLED_DIR, entry["skin"]))
+                manifest.pop(entry["skin"], None)
+
+    logger.info("Skin sync plan: %d to install, %d to remove, %d unchanged",
+                sum(len(entries) for _, entries in plan.jobs), len(plan.removed), plan.unchanged)
+
+    installed = 0
+    saved = 0
+    try:
+        for champ, installed_entries in run_install_jobs(plan.jobs, workers, executor, source):
+            journal_records = []
+            for entry in installed_entries:
+                saved += entry.get("dedup_saved", 0)
+                record_skin(manifest, champ, entry)
+                journal_records.append({"skin": entry["skin"], "record": manifest[entry["skin"]]})
+            append_journal(INSTALL_JOURNAL_FILE, journal_records)
+            installed += len(installed_entries)
+    finally:
+        # Once the manifest holds everything the journal recorded, the journal is spent.
+        if save_manifest(manifest):
+            remove_file(INSTALL_JOURNAL_FILE)
+
+    if get_setting("dedup_store"):
+        if installed:
+            logger.info("Dedup store saved %.1f MiB of writes over %d installed skins",
+                        saved / (1024 * 1024), installed)
+            metrics.incr("dedup.bytes_saved", saved)
+        if installed or plan.removed:
+            # Replaced and removed skin folders hold links to their blobs until they are purged.
+            after_purge(get_store().collect_garbage)
+
+    return installed, len(plan.removed), plan.unchanged
@@ -0,0 +1,103 @@
+import os
+import json
+import collections
+from config import INSTALLED_MANIFEST_FILE
+from trash import move_to_trash
+from skin_archive import LAYOUT_ARCHIVE, archive_path
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+MANIFEST_VERSION = 1
+
+SyncPlan = collections.namedtuple("SyncPlan", ["jobs", "removed", "unchanged"])
+
+def load_manifest(path=INSTALLED_MANIFEST_FILE):
+    """Return {skin_name: record} for skins installed from the repo zip."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.warning("Ignoring unreadable installed manifest %s: %s", path, e)
+        return {}
+
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data.get("skins", {})
+
+def save_manifest(skins, path=INSTALLED_MANIFEST_FILE):
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": MANIFEST_VERSION, "skins": skins}, f)
+        os.replace(tmp_path, path)
+        return True
+    except Exception as e:
+        logger.error("Failed to write installed manifest %s: %s", path, e)
+        return False
+
+def record_skin(skins, champion, entry):
+    skins[entry["skin"]] = {
+        "champion": champion,
+        "entry": entry["name"],
+        "crc": entry["crc"],
+        "size": entry["size"],
+        "fingerprint": entry.get("fingerprint"),
+        "layout": entry.get("layout", "folder"),
+    }
+
+def is_entry_current(record, entry, layout="folder"):
+    return (
+        record is not None
+        and record.get("layout", "folder") == layout
+        and record.get("entry") == entry["name"]
+        and record.get("crc") == entry["crc"]
+        and record.get("size") == entry["size"]
+    )
+
+def is_skin_present(installed_dir, skin_name, record):
+    """Whether a skin's files are on disk: its folder, and for the archive layout also its zip."""
+    if not os.path.isdir(os.path.join(installed_dir, skin_name)):
+        return False
+    if record.get("layout") == LAYOUT_ARCHIVE:
+        # Not expanded yet is still installed; the zip is what gets expanded later.
+        return os.path.isfile(archive_path(skin_name))
+    return True
+
+def plan_sync(skins, index, champions, skip_chromas, installed_dir, repair=(), layout="folder"):
+    """
+    Diff the manifest against the repo index for the given champions.
+    Skins named in repair, or installed with a different layout, are re-extracted even
+    if their entry is unchanged.
+    Returns the (champion, entries) jobs to extract, the skin names to delete and
+    the number of skins that are already up to date.
+    """
+    wanted = set()
+    jobs = []
+    unchanged = 0
+    for champ in champions:
+        pending = []
+        for entry in index.get(champ, []):
+            if skip_chromas and entry["chroma"]:
+                continue
+            wanted.add(entry["skin"])
+            if (is_entry_current(skins.get(entry["skin"]), entry, layout)
+                    and entry["skin"] not in repair
+                    and is_skin_present(installed_dir, entry["skin"], skins[entry["skin"]])):
+                unchanged += 1
+            else:
+                pending.append(entry)
+        if pending:
+            jobs.append((champ, pending))
+
+    removed = sorted(name for name in skins if name not in wanted)
+    return SyncPlan(jobs, removed, unchanged)
+
+def remove_skin_dir(path):
+    try:
+        if os.path.isdir(path):
+            move_to_trash(path)
+    except Exception as e:
+        logger.error("Failed to remove skin folder %s: %s", path, e)
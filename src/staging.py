@@ -0,0 +1,99 @@
+import os
+import json
+import uuid
+import shutil
+from trash import move_to_trash
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+def new_staging_path(staging_dir, name):
+    """Unique path inside staging_dir for building name before it is swapped in."""
+    os.makedirs(staging_dir, exist_ok=True)
+    return os.path.join(staging_dir, f"{name}.{uuid.uuid4().hex[:8]}")
+
+def swap_in(staged_path, target_path):
+    """
+    Replace target_path with staged_path using renames only. Both must be on the same
+    volume. The old target is renamed next to the staged copy and trashed after the swap,
+    so target_path is only ever missing between two renames.
+    """
+    old_path = None
+    if os.path.lexists(target_path):
+        old_path = staged_path + ".old"
+        os.rename(target_path, old_path)
+    try:
+        os.rename(staged_path, target_path)
+    except Exception:
+        if old_path is not None:
+            os.rename(old_path, target_path)
+        raise
+    if old_path is not None:
+        move_to_trash(old_path)
+
+def clear_staging(staging_dir):
+    """Remove leftovers of an interrupted run from staging_dir."""
+    if not os.path.isdir(staging_dir):
+        return
+    leftovers = os.listdir(staging_dir)
+    if leftovers:
+        logger.info("Removing %d leftover staged items from %s", len(leftovers), staging_dir)
+    for name in leftovers:
+        path = os.path.join(staging_dir, name)
+        try:
+            if os.path.isdir(path) and not os.path.islink(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+        except Exception as e:
+            logger.error("Failed to remove staged item %s: %s", path, e)
+
+# ---------- Journals ----------
+
+def append_journal(path, records):
+    """Append records (JSON lines) and flush them to disk before returning."""
+    if not records:
+        return
+    with open(path, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def read_journal(path):
+    """Return the complete records of a JSON lines journal; a torn last line is ignored."""
+    records = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    logger.warning("Ignoring incomplete journal line in %s", path)
+    except FileNotFoundError:
+        pass
+    return records
+
+def write_state(path, state):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def read_state(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning("Ignoring unreadable state file %s: %s", path, e)
+        return None
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,74 @@
+import sys
+import time
+import threading
+import importlib.abc
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Imports taking longer than this (cumulative, ms) are listed in the report.
+REPORT_MIN_MS = 5
+
+_records = []
+_local = threading.local()
+_finder = None
+
+class _TimedLoader(importlib.abc.Loader):
+    """Wraps a module's loader to time exec_module, like python -X importtime."""
+
+    def __init__(self, loader):
+        self._loader = loader
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            cumulative = time.perf_counter() - started
+            nested = stack.pop()
+            if stack:
+                stack[-1] += cumulative
+            _records.append((module.__name__, cumulative - nested, cumulative))
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader)
+                return spec
+        return None
+
+def enable_import_timing():
+    """Time every module imported from now on (lazy imports included)."""
+    global _finder
+    if _finder is None:
+        _finder = _ImportTimer()
+        sys.meta_path.insert(0, _finder)
+
+def log_startup_report(milestone, elapsed_ms, target_ms):
+    """Log the time to a milestone against its target plus the slowest imports so far."""
+    level = logger.warning if elapsed_ms > target_ms else logger.info
+    level("Startup report: %s after %.0f ms (target %d ms)", milestone, elapsed_ms, target_ms)
+    if _finder is None:
+        return
+    records = sorted(_records, key=lambda r: r[2], reverse=True)
+    logger.info("Startup report: %d modules imported lazily, %.0f ms self time in total",
+                len(records), sum(r[1] for r in records) * 1000)
+    logger.info("Startup report: %10s | %10s | %s", "self [ms]", "cumul [ms]", "module")
+    for name, self_time, cumulative in records:
+        if cumulative * 1000 >= REPORT_MIN_MS:
+            logger.info("Startup report: %10.1f | %10.1f | %s", self_time * 1000, cumulative * 1000, name)
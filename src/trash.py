@@ -0,0 +1,222 @@
+import os
+import sys
+import stat
+import uuid
+import threading
+import concurrent.futures
+from config import TRASH_DIR
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+PURGE_WORKERS = 4
+
+def lower_thread_priority():
+    """Best effort: run the calling thread at background CPU (and on Windows, I/O) priority."""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_MODE_BACKGROUND_BEGIN)
+        elif hasattr(os, "setpriority"):
+            # On Linux a thread id given as PRIO_PROCESS only affects that thread.
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+    except Exception:
+        pass
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except PermissionError:
+        if os.path.isdir(path):
+            # Directory symlinks and junctions are removed with rmdir on Windows.
+            os.rmdir(path)
+        else:
+            # Read-only files cannot be deleted on Windows until made writable.
+            os.chmod(path, stat.S_IWRITE)
+            os.remove(path)
+
+def purge_tree(root, workers=PURGE_WORKERS):
+    """
+    Delete the tree at root: folders are scanned with os.scandir on a pool of workers, each
+    deleting the files it finds and queueing the subfolders, then the folders are removed
+    deepest first. Returns (files_removed, errors). Does not log, so it is safe to use on a
+    tree holding this app's own log folder.
+    """
+    if not os.path.lexists(root):
+        return 0, 0
+    if not os.path.isdir(root) or os.path.islink(root):
+        _remove_file(root)
+        return 1, 0
+
+    counts = {"files": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def scan(path):
+        subdirs = []
+        files = errors = 0
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        else:
+                            _remove_file(entry.path)
+                            files += 1
+                    except FileNotFoundError:
+                        pass
+                    except OSError:
+                        errors += 1
+        except FileNotFoundError:
+            pass
+        except OSError:
+            errors += 1
+        with lock:
+            counts["files"] += files
+            counts["errors"] += errors
+        return subdirs
+
+    # A folder is always listed after the one it was found in, so reversed order is deepest first.
+    dirs = [root]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="trash-purge",
+                                               initializer=lower_thread_priority) as pool:
+        pending = {pool.submit(scan, root)}
+        while pending:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                for subdir in future.result():
+                    dirs.append(subdir)
+                    pending.add(pool.submit(scan, subdir))
+
+    for path in reversed(dirs):
+        try:
+            os.rmdir(path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            counts["errors"] += 1
+    return counts["files"], counts["errors"]
+
+class Purger:
+    """Background thread that empties the trash folder, woken whenever something is trashed."""
+
+    def __init__(self, trash_dir=TRASH_DIR, workers=PURGE_WORKERS):
+        self.trash_dir = trash_dir
+        self.workers = workers
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._idle = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._after_purge = []
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="trash-purger", daemon=True)
+        self._thread.start()
+        return self
+
+    def wake(self):
+        with self._lock:
+            self._idle.clear()
+            self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def after_purge(self, callback):
+        """Run callback on the purge thread once everything trashed so far is deleted."""
+        with self._lock:
+            self._after_purge.append(callback)
+        self.wake()
+
+    def wait_idle(self, timeout=None):
+        """Block until the trash is empty (or timeout); returns True if it is."""
+        return self._idle.wait(timeout)
+
+    def _run(self):
+        lower_thread_priority()
+        while not self._stop.is_set():
+            self._wake.clear()
+            self.purge_once()
+            callbacks = []
+            with self._lock:
+                if not self._wake.is_set():
+                    callbacks, self._after_purge = self._after_purge, []
+                    self._idle.set()
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception:
+                    logger.exception("After-purge callback failed")
+            self._wake.wait()
+
+    def purge_once(self):
+        """Purge everything currently in the trash; returns the number of files removed."""
+        try:
+            names = os.listdir(self.trash_dir)
+        except FileNotFoundError:
+            return 0
+        removed = 0
+        for name in names:
+            if self._stop.is_set():
+                break
+            files, errors = purge_tree(os.path.join(self.trash_dir, name), self.workers)
+            removed += files
+            if errors:
+                logger.warning("Could not purge %d items of %s; retrying on next start", errors, name)
+        if removed:
+            logger.info("Purged %d trashed files", removed)
+        return removed
+
+_purger = None
+_purger_lock = threading.Lock()
+
+def start_purger():
+    """Start the background purge (resuming trash left by an earlier run)."""
+    global _purger
+    with _purger_lock:
+        if _purger is None:
+            _purger = Purger().start()
+        _purger.wake()
+        return _purger
+
+def stop_purger():
+    with _purger_lock:
+        if _purger is not None:
+            _purger.stop()
+
+def after_purge(callback):
+    """
+    Run callback once the trash is purged (e.g. blob GC, which counts the hard links
+    trashed skin folders still hold); runs it right away when no purger is running.
+    """
+    with _purger_lock:
+        purger = _purger
+    if purger is None:
+        callback()
+    else:
+        purger.after_purge(callback)
+
+def move_to_trash(path, trash_dir=TRASH_DIR):
+    """
+    Take path out of the way with a single rename into the trash folder and leave the
+    deletion to the background purge. Falls back to deleting in place when the rename
+    fails (another volume, files in use). Returns True if path is gone.
+    """
+    if not os.path.lexists(path):
+        return True
+    try:
+        os.makedirs(trash_dir, exist_ok=True)
+        os.rename(path, os.path.join(trash_dir, f"{os.path.basename(path)}-{uuid.uuid4().hex[:8]}"))
+    except OSError as e:
+        logger.warning("Could not move %s to the trash (%s); deleting it in place", path, e)
+        purge_tree(path)
+        return not os.path.lexists(path)
+    with _purger_lock:
+        purger = _purger
+    if purger is not None:
+        purger.wake()
+    return True
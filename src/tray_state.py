@@ -0,0 +1,96 @@
+import sys
+import time
+import threading
+from PIL import Image, ImageDraw
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+ICON_SIZES = (16, 20, 24, 32, 40, 48, 64)
+COALESCE_SECONDS = 0.25
+
+def make_colored_icon(rgb, size=64):
+    img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    d = ImageDraw.Draw(img)
+    margin = max(1, size // 8)
+    d.ellipse((margin, margin, size - margin, size - margin), fill=rgb)
+    return img
+
+def tray_icon_size():
+    """Pixel size of the notification area icon for the current DPI (64 elsewhere)."""
+    if sys.platform == 'win32':
+        try:
+            import ctypes
+            SM_CXSMICON = 49
+            size = ctypes.windll.user32.GetSystemMetrics(SM_CXSMICON)
+            if size > 0:
+                return min(ICON_SIZES, key=lambda s: (s < size, abs(s - size)))
+        except Exception:
+            pass
+    return 64
+
+class TrayState:
+    """
+    Owns what the tray shows for each status. Icons are rendered once per status at
+    the tray's DPI, unchanged statuses are ignored, and bursts of changes are coalesced
+    so only the latest status within COALESCE_SECONDS reaches the tray.
+    """
+
+    def __init__(self, status_colors, coalesce_seconds=COALESCE_SECONDS):
+        size = tray_icon_size()
+        self.icons = {
+            status: {s: make_colored_icon(rgb, s) for s in ICON_SIZES}
+            for status, rgb in status_colors.items()
+        }
+        self._size = size
+        self._coalesce = coalesce_seconds
+        self._lock = threading.Lock()
+        self._icon = None
+        self._applied = None
+        self._wanted = None
+        self._last_apply = 0.0
+        self._timer = None
+        self.updates = 0
+
+    def icon_for(self, status):
+        return self.icons[status][self._size]
+
+    def attach(self, icon, status):
+        with self._lock:
+            self._icon = icon
+            self._wanted = status
+            self._apply_locked()
+
+    def set(self, status):
+        with self._lock:
+            if status == self._wanted:
+                return
+            self._wanted = status
+            if self._icon is None or self._timer is not None:
+                return
+            delay = self._last_apply + self._coalesce - time.monotonic()
+            if delay <= 0:
+                self._apply_locked()
+            else:
+                self._timer = threading.Timer(delay, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _flush(self):
+        with self._lock:
+            self._timer = None
+            self._apply_locked()
+
+    def _apply_locked(self):
+        status = self._wanted
+        if self._icon is None or status == self._applied:
+            return
+        try:
+            self._icon.icon = self.icon_for(status)
+            # The menu reads the status lazily, so it only needs a refresh, not a rebuild.
+            self._icon.update_menu()
+            self._applied = status
+            self.updates += 1
+        except Exception:
+            logger.debug("Failed to set tray icon/menu (maybe not initialized yet)")
+        self._last_apply = time.monotonic()
@@ -5,8 +5,11 @@ import shutil
 import ctypes
 import winreg
 from ctypes import wintypes
+import uuid
+import threading
 import psutil
 from config import DATA_DIR, INSTALL_DIR, PROJECT_ROOT, APP_NAME
+from trash import purge_tree
 
 def is_admin():
     try:
@@ -90,11 +93,37 @@ def remove_start_menu_shortcut():
     except Exception as e:
         print("remove_start_menu_shortcut failed:", e)
 
+def start_data_removal():
+    """
+    Rename DATA_DIR aside (one rename, so it is gone from its place at once) and delete it
+    on a background thread. Returns the thread and a dict that gets the purge result.
+    """
+    target = DATA_DIR
+    trashed = f"{DATA_DIR}.uninstall-{uuid.uuid4().hex[:8]}"
+    try:
+        os.rename(DATA_DIR, trashed)
+        target = trashed
+    except FileNotFoundError:
+        target = None
+    except OSError as e:
+        print(f"Could not rename {DATA_DIR} ({e}); deleting it in place")
+
+    result = {"files": 0, "errors": 0, "path": target}
+
+    def purge():
+        if target is not None:
+            result["files"], result["errors"] = purge_tree(target)
+
+    thread = threading.Thread(target=purge, name="uninstall-purge")
+    thread.start()
+    return thread, result
+
 def main():
     if sys.platform != 'win32':
         try:
-            shutil.rmtree(DATA_DIR, ignore_errors=True)
-            print("Removed", DATA_DIR)
+            thread, result = start_data_removal()
+            thread.join()
+            print("Removed", DATA_DIR, f"({result['files']} files, {result['errors']} errors)")
         except Exception as e:
             print("Failed to remove:", e)
         return
@@ -123,8 +152,13 @@ def main():
     try:
         remove_from_startup()
         remove_start_menu_shortcut()
-        shutil.rmtree(DATA_DIR, ignore_errors=True)
+        thread, result = start_data_removal()
+        # The files are deleted while the message is shown; exiting waits for the purge.
         message_box(f"Successfully removed {DATA_DIR}", "Uninstall complete")
+        thread.join()
+        if result["errors"]:
+            message_box(f"Some files in {result['path']} could not be deleted; you can remove it manually.",
+                        "Uninstall incomplete")
     except Exception as e:
         message_box(f"Failed to remove {DATA_DIR}: {e}", "Uninstall failed")
 
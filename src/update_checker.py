@@ -1,21 +1,35 @@
 import os
 import subprocess
-import requests
+import http_session
+import metrics
 import shutil
 import zipfile
-import tempfile
 from config import (
     INSTALL_DIR,
     GITHUB_RELEASES_URL,
-    DATA_DIR,
     VERSION_FILE,
     LOL_VERSION_FILE,
     DOWNLOAD_DIR,
     LOL_VERSION_URL,
     SKINS_REPO_COMMIT_URL,
     SKIN_REPO_COMMIT_FILE,
-    PROFILES_DIR
+    INSTALLED_HASH_FILE,
+    MANAGER_STAGING_DIR,
+    MANAGER_UPDATE_JOURNAL_FILE,
+    BLOB_STORE_DIR,
+    ARCHIVE_DIR,
+    MANAGER_DOWNLOAD_DIR,
+    REPO_ZIP_PATH
 )
+from staging import read_state, write_state, remove_file
+from manager_diff import (
+    plan_manager_diff, find_locked_files, apply_manager_diff, save_manager_manifest, scan_manager_files
+)
+from repo_patch import patch_repo_zip
+from trash import move_to_trash
+from metadata_client import get_json
+from settings import get_setting
+from pipeline import run_stages
 from logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -29,16 +43,14 @@ def get_installed_version():
 
 def get_latest_manager_version():
     try:
-        resp = requests.get(GITHUB_RELEASES_URL, timeout=10)
-        resp.raise_for_status()
-        return resp.json().get("tag_name", "")
+        return get_json(GITHUB_RELEASES_URL).get("tag_name", "")
     except Exception as e:
         logger.error(f"Manager version check failed: {e}")
         return None
 
 def get_latest_lol_version():
     try:
-        versions = requests.get(LOL_VERSION_URL, timeout=5).json()
+        versions = get_json(LOL_VERSION_URL, timeout=5)
         return versions[0] if versions else None
     except Exception as e:
         logger.error(f"LoL version fetch failed: {e}")
@@ -48,9 +60,7 @@ def get_latest_repo_commit():
     """Fetch latest commit SHA from darkseal repo."""
     try:
         headers = {"Accept": "application/vnd.github+json"}
-        resp = requests.get(SKINS_REPO_COMMIT_URL, headers=headers, timeout=10)
-        resp.raise_for_status()
-        return resp.json().get("sha")
+        return get_json(SKINS_REPO_COMMIT_URL, headers=headers).get("sha")
     except Exception as e:
         logger.error(f"Repo commit fetch failed: {e}")
         return None
@@ -58,7 +68,7 @@ def get_latest_repo_commit():
 def download_asset(asset_url, temp_dir):
     temp_file = os.path.join(temp_dir, os.path.basename(asset_url))
     try:
-        with requests.get(asset_url, stream=True, timeout=30) as response:
+        with http_session.get(asset_url, stream=True, timeout=30) as response:
             response.raise_for_status()
             with open(temp_file, "wb") as f:
                 for chunk in response.iter_content(chunk_size=8192):
@@ -68,137 +78,320 @@ def download_asset(asset_url, temp_dir):
         logger.error(f"Download failed: {e}")
         return None
 
+def _extract_update(temp_file, dest):
+    if temp_file.endswith(".zip"):
+        logger.info("Extracting update via ZipFile...")
+        with zipfile.ZipFile(temp_file, "r") as zip_ref:
+            zip_ref.extractall(dest)
+        return True
+
+    if temp_file.endswith(".exe"):
+        logger.info("Extracting update via SFX Exe...")
+        output_flag = f"-o{os.path.abspath(dest)}"
+
+        process = subprocess.run(
+            [temp_file, "-y", output_flag],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            creationflags=subprocess.CREATE_NO_WINDOW
+        )
+
+        if process.returncode != 0:
+            logger.error(f"SFX extraction failed. Code: {process.returncode}, Err: {process.stderr.decode()}")
+            return False
+        return True
+
+    logger.error("Unsupported update file: %s", temp_file)
+    return False
+
+def _carry_over_user_data(old_dir, new_dir):
+    """Move installed skins, their blobs and archives and .profile files from the old manager folder into the new one."""
+    for name in ("installed", os.path.basename(BLOB_STORE_DIR), os.path.basename(ARCHIVE_DIR)):
+        old_path = os.path.join(old_dir, name)
+        if os.path.isdir(old_path):
+            new_path = os.path.join(new_dir, name)
+            if os.path.isdir(new_path):
+                shutil.rmtree(new_path)
+            os.rename(old_path, new_path)
+
+    old_profiles = os.path.join(old_dir, "profiles")
+    if os.path.isdir(old_profiles):
+        new_profiles = os.path.join(new_dir, "profiles")
+        os.makedirs(new_profiles, exist_ok=True)
+        for profile_item in os.listdir(old_profiles):
+            if profile_item.endswith(".profile"):
+                os.replace(os.path.join(old_profiles, profile_item), os.path.join(new_profiles, profile_item))
+
+def finish_manager_update(journal):
+    """
+    Roll a staged manager update forward from whatever step it reached. Every step
+    checks the disk first, so it is safe to run again after a crash at any point.
+    """
+    old_dir = INSTALL_DIR + ".old"
+    new_dir = journal["new_dir"]
+
+    if os.path.isdir(new_dir):
+        if os.path.isdir(INSTALL_DIR) and not os.path.isdir(old_dir):
+            os.rename(INSTALL_DIR, old_dir)
+        if os.path.isdir(old_dir):
+            _carry_over_user_data(old_dir, new_dir)
+        os.rename(new_dir, INSTALL_DIR)
+
+    with open(VERSION_FILE, "w", encoding="utf-8") as f:
+        f.write(journal["version"])
+
+    move_to_trash(old_dir)
+    shutil.rmtree(MANAGER_STAGING_DIR, ignore_errors=True)
+    # Record what was installed so the next release can be applied differentially.
+    save_manager_manifest(scan_manager_files())
+    remove_file(MANAGER_UPDATE_JOURNAL_FILE)
+    logger.info("Installed update and wrote version %s", journal["version"])
+
+def finish_manager_diff(journal):
+    """
+    Apply a release zip differentially. Re-running it after a crash is safe: files that
+    were already replaced now match the release and are skipped.
+    """
+    with zipfile.ZipFile(journal["archive"]) as archive:
+        diff = plan_manager_diff(archive)
+        bytes_written, files = apply_manager_diff(archive, diff)
+    save_manager_manifest(files)
+
+    with open(VERSION_FILE, "w", encoding="utf-8") as f:
+        f.write(journal["version"])
+
+    remove_file(MANAGER_UPDATE_JOURNAL_FILE)
+    metrics.incr("manager_update.bytes_written", bytes_written)
+    logger.info("Installed update %s: %d files written (%.1f MiB), %d unchanged, %d stale removed",
+                journal["version"], len(diff.write), bytes_written / (1024 * 1024), diff.unchanged, len(diff.stale))
+
+def recover_manager_update():
+    """Finish a manager update interrupted after its swap began, or undo one that never got that far."""
+    journal = read_state(MANAGER_UPDATE_JOURNAL_FILE)
+    if journal is None:
+        shutil.rmtree(MANAGER_DOWNLOAD_DIR, ignore_errors=True)
+        old_dir = INSTALL_DIR + ".old"
+        if os.path.isdir(old_dir) and not os.path.isdir(INSTALL_DIR):
+            logger.info("Restoring manager folder from an aborted update")
+            os.rename(old_dir, INSTALL_DIR)
+        if os.path.isdir(MANAGER_STAGING_DIR):
+            logger.info("Removing unfinished manager update staging folder")
+            shutil.rmtree(MANAGER_STAGING_DIR, ignore_errors=True)
+        return False
+    try:
+        logger.info("Resuming interrupted manager update to %s", journal["version"])
+        if journal.get("mode") == "diff":
+            if not os.path.isfile(journal["archive"]):
+                # Nothing to resume from; the version file is unchanged, so the update is redone.
+                logger.warning("Manager update archive is gone; the update will be downloaded again")
+                remove_file(MANAGER_UPDATE_JOURNAL_FILE)
+                return False
+            finish_manager_diff(journal)
+            shutil.rmtree(MANAGER_DOWNLOAD_DIR, ignore_errors=True)
+        else:
+            finish_manager_update(journal)
+        return True
+    except Exception as e:
+        logger.error(f"Failed to resume manager update: {e}")
+        return False
+
+def install_update_diff(temp_file, new_version):
+    """
+    Install a .zip release by writing only the files whose size or CRC32 changed and
+    deleting files the previous release shipped but this one does not. Without a manager
+    manifest every release file is written and leftovers of older releases are removed.
+    Files of this app and the user (installed skins, saved profiles) are never touched.
+    """
+    try:
+        with zipfile.ZipFile(temp_file) as archive:
+            diff = plan_manager_diff(archive)
+        locked = find_locked_files(diff)
+        if locked:
+            logger.error("Manager files are in use, update postponed: %s", ", ".join(locked[:5]))
+            return False
+
+        journal = {"version": new_version, "mode": "diff", "archive": os.path.abspath(temp_file)}
+        write_state(MANAGER_UPDATE_JOURNAL_FILE, journal)
+        finish_manager_diff(journal)
+        return True
+    except Exception as e:
+        logger.error(f"Installation failed: {e}")
+        return False
+
 def install_update(temp_file, new_version):
     """
     Install update from downloaded file and record version.
-    to avoid nested folders introduced by repo zip internal structure.
+    .zip releases are applied differentially in place. Other assets are extracted into a
+    staging folder first; the current manager is only touched once extraction succeeded,
+    and the swap is journaled so an interrupted update is finished on the next start
+    instead of leaving a half-deleted folder.
     """
+    if temp_file.endswith(".zip") and os.path.isdir(INSTALL_DIR):
+        return install_update_diff(temp_file, new_version)
     try:
-        for item in os.listdir(INSTALL_DIR):
-            if item != "installed":  
-                path = os.path.join(INSTALL_DIR, item)
-                if item == "profiles" and os.path.isdir(path):
-                    for profile_item in os.listdir(path):
-                        profile_path = os.path.join(path, profile_item)
-                        if not profile_item.endswith(".profile"):
-                            try:
-                                if os.path.isdir(profile_path):
-                                    shutil.rmtree(profile_path)
-                                else:
-                                    os.remove(profile_path)
-                                logger.info("Deleted non-profile item in profiles: %s", profile_item)
-                            except Exception as e:
-                                logger.error("Failed to delete non-profile item %s: %s", profile_item, e)
-                else:
-                    try:
-                        if os.path.isdir(path):
-                            shutil.rmtree(path)
-                        else:
-                            os.remove(path)
-                        logger.info("Deleted item during manager update: %s", item)
-                    except Exception as e:
-                        logger.error("Failed to delete item %s during manager update: %s", item, e)
-
-        if temp_file.endswith(".zip"):
-            logger.info("Extracting update via ZipFile...")
-            with zipfile.ZipFile(temp_file, "r") as zip_ref:
-                zip_ref.extractall(DATA_DIR)
-        
-        elif temp_file.endswith(".exe"):
-            logger.info("Extracting update via SFX Exe...")
-            output_flag = f"-o{os.path.abspath(DATA_DIR)}"
-            
-            process = subprocess.run(
-                [temp_file, "-y", output_flag],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                creationflags=subprocess.CREATE_NO_WINDOW  
-            )
-            
-            if process.returncode != 0:
-                logger.error(f"SFX extraction failed. Code: {process.returncode}, Err: {process.stderr.decode()}")
-                return False
+        shutil.rmtree(MANAGER_STAGING_DIR, ignore_errors=True)
+        os.makedirs(MANAGER_STAGING_DIR)
+        if not _extract_update(temp_file, MANAGER_STAGING_DIR):
+            shutil.rmtree(MANAGER_STAGING_DIR, ignore_errors=True)
+            return False
 
-        with open(VERSION_FILE, "w", encoding="utf-8") as f:
-            f.write(new_version)
+        # Archives ship a top level cslol-manager folder; otherwise the staging root is the manager.
+        new_dir = os.path.join(MANAGER_STAGING_DIR, os.path.basename(INSTALL_DIR))
+        if not os.path.isdir(new_dir):
+            new_dir = MANAGER_STAGING_DIR
 
-        logger.info("Installed update and wrote version %s", new_version)
+        journal = {"version": new_version, "new_dir": new_dir}
+        write_state(MANAGER_UPDATE_JOURNAL_FILE, journal)
+
+        # Fail before committing to the swap if the manager folder is locked (e.g. still running).
+        if os.path.isdir(INSTALL_DIR):
+            try:
+                os.rename(INSTALL_DIR, INSTALL_DIR + ".old")
+            except OSError as e:
+                logger.error(f"Manager folder is in use, update postponed: {e}")
+                remove_file(MANAGER_UPDATE_JOURNAL_FILE)
+                shutil.rmtree(MANAGER_STAGING_DIR, ignore_errors=True)
+                return False
+
+        finish_manager_update(journal)
         return True
     except Exception as e:
         logger.error(f"Installation failed: {e}")
         return False
 
 def reset_skins_and_update_file(file_path, new_value, change_key):
+    """
+    Drop the downloaded skins repo so the next install fetches a fresh archive.
+    Installed skins are kept: the next install diffs them against the installed
+    manifest and only re-extracts skins whose repo entries changed.
+    """
     try:
-        shutil.rmtree(DOWNLOAD_DIR, ignore_errors=True)
+        move_to_trash(DOWNLOAD_DIR)
         os.makedirs(DOWNLOAD_DIR, exist_ok=True)
         installed_dir = os.path.join(INSTALL_DIR, "installed")
-        shutil.rmtree(installed_dir, ignore_errors=True)
         os.makedirs(installed_dir, exist_ok=True)
+        if os.path.exists(INSTALLED_HASH_FILE):
+            os.remove(INSTALLED_HASH_FILE)
         return True
     except Exception as e:
         logger.exception(f"Failed to reset skins on {change_key}")
         return False
 
-def check_and_update():
-    results = {'manager_updated': False, 'lol_version_changed': False, 'skin_repo_commit_changed': False}
-
+def update_manager(latest_mgr):
+    """Download and install the latest CSLOL Manager release if it differs from the installed one."""
     current_mgr = get_installed_version()
-    latest_mgr = get_latest_manager_version()
-    if latest_mgr and current_mgr != latest_mgr:
-        logger.info("Manager update detected: %s -> %s", current_mgr, latest_mgr)
-        try:
-            release_data = requests.get(GITHUB_RELEASES_URL, timeout=10).json()
-            assets = release_data.get("assets", [])
-
-            asset_obj = next((a for a in assets if a["name"].endswith(".zip")), None)
-
-            if not asset_obj:
-                asset_obj = next((a for a in assets if a["name"].endswith(".exe") and "manager" in a["name"].lower()), None)
-
-            if asset_obj:
-                asset_url = asset_obj["browser_download_url"]
-                asset_name = asset_obj["name"]
-                logger.info(f"Downloading update asset: {asset_name}")
-
-                with tempfile.TemporaryDirectory() as tmp:
-                    tmp_file = download_asset(asset_url, tmp)
-                    
-                    if tmp_file and install_update(tmp_file, latest_mgr):
-                        results['manager_updated'] = True
-                        logger.info("Manager updated to %s", latest_mgr)
-            else:
-                logger.warning("No suitable update asset (.zip or .exe) found for release %s", latest_mgr)
-
-        except Exception as e:
-            logger.exception("Manager update process failed: %s", e)
+    if not latest_mgr or current_mgr == latest_mgr:
+        return False
+
+    logger.info("Manager update detected: %s -> %s", current_mgr, latest_mgr)
+    try:
+        release_data = get_json(GITHUB_RELEASES_URL)
+        assets = release_data.get("assets", [])
+
+        asset_obj = next((a for a in assets if a["name"].endswith(".zip")), None)
+
+        if not asset_obj:
+            asset_obj = next((a for a in assets if a["name"].endswith(".exe") and "manager" in a["name"].lower()), None)
+
+        if asset_obj:
+            asset_url = asset_obj["browser_download_url"]
+            asset_name = asset_obj["name"]
+            logger.info(f"Downloading update asset: {asset_name}")
+
+            # Kept outside a temp dir so an interrupted differential update can be finished on restart.
+            shutil.rmtree(MANAGER_DOWNLOAD_DIR, ignore_errors=True)
+            os.makedirs(MANAGER_DOWNLOAD_DIR)
+            try:
+                tmp_file = download_asset(asset_url, MANAGER_DOWNLOAD_DIR)
+
+                if tmp_file and install_update(tmp_file, latest_mgr):
+                    logger.info("Manager updated to %s", latest_mgr)
+                    return True
+            finally:
+                # A journaled differential update resumes from the downloaded asset on the next start.
+                if read_state(MANAGER_UPDATE_JOURNAL_FILE) is None:
+                    shutil.rmtree(MANAGER_DOWNLOAD_DIR, ignore_errors=True)
+        else:
+            logger.warning("No suitable update asset (.zip or .exe) found for release %s", latest_mgr)
+
+    except Exception as e:
+        logger.exception("Manager update process failed: %s", e)
+    return False
 
+def check_lol_version(latest_lol):
     current_lol = None
     lol_file_exists = os.path.exists(LOL_VERSION_FILE)
     if lol_file_exists:
         with open(LOL_VERSION_FILE, 'r', encoding='utf-8') as f:
             current_lol = f.read().strip()
 
-    latest_lol = get_latest_lol_version()
-    if latest_lol and lol_file_exists and current_lol != latest_lol or not lol_file_exists:  
+    if latest_lol and lol_file_exists and current_lol != latest_lol or not lol_file_exists:
         logger.info("LoL version changed: %s -> %s", current_lol, latest_lol)
-        if reset_skins_and_update_file(LOL_VERSION_FILE, latest_lol, 'lol_version_changed'):
-            results['lol_version_changed'] = True
-        else:
-            results['lol_version_changed'] = False
+        return reset_skins_and_update_file(LOL_VERSION_FILE, latest_lol, 'lol_version_changed')
+    return False
+
+# check_repo_commit results: the repo zip was patched in place, or dropped for a full download.
+REPO_PATCHED = "patched"
+REPO_RESET = "reset"
 
+def check_repo_commit(latest_repo_commit):
+    """REPO_PATCHED or REPO_RESET when the skins repo moved to a new commit, else None."""
     current_repo_commit = None
     commit_file_exists = os.path.exists(SKIN_REPO_COMMIT_FILE)
     if commit_file_exists:
         with open(SKIN_REPO_COMMIT_FILE, 'r', encoding='utf-8') as f:
             current_repo_commit = f.read().strip()
 
-    latest_repo_commit = get_latest_repo_commit()
-    if latest_repo_commit and commit_file_exists and current_repo_commit != latest_repo_commit or not commit_file_exists:  
+    if latest_repo_commit and commit_file_exists and current_repo_commit != latest_repo_commit or not commit_file_exists:
         logger.info("Repo commit changed: %s -> %s", current_repo_commit, latest_repo_commit)
+        if latest_repo_commit and patch_repo(latest_repo_commit):
+            return REPO_PATCHED
         if reset_skins_and_update_file(SKIN_REPO_COMMIT_FILE, latest_repo_commit, 'skin_repo_commit_changed'):
-            results['skin_repo_commit_changed'] = True
-        else:
-            results['skin_repo_commit_changed'] = False
+            return REPO_RESET
+    return None
+
+def patch_repo(latest_repo_commit):
+    """
+    Patch the downloaded repo zip to latest_repo_commit (repo_refresh "patch"); the installed
+    hash is dropped so the next install syncs the changed skins. False means a full reset is needed.
+    """
+    if get_setting("repo_refresh") != "patch" or not os.path.exists(REPO_ZIP_PATH):
+        return False
+    try:
+        if not patch_repo_zip(latest_repo_commit,
+                              max_files=int(get_setting("repo_patch_max_files") or 0),
+                              workers=max(1, int(get_setting("download_connections") or 1))):
+            return False
+        if os.path.exists(INSTALLED_HASH_FILE):
+            os.remove(INSTALLED_HASH_FILE)
+        return True
+    except Exception as e:
+        logger.exception("Repo patch failed: %s", e)
+        return False
+
+@metrics.timed("update.check_ms")
+def check_and_update():
+    """
+    Look up the manager release, LoL version and skins repo commit in parallel, then
+    apply the skin resets and the manager update. The manager update runs last: it
+    renames INSTALL_DIR, which holds the installed/ folder the skin resets recreate.
+    """
+    stages = run_stages("update check", [
+        ("manager_release", lambda r: get_latest_manager_version(), ()),
+        ("lol_version", lambda r: get_latest_lol_version(), ()),
+        ("repo_commit", lambda r: get_latest_repo_commit(), ()),
+        ("lol_version_changed", lambda r: check_lol_version(r["lol_version"]), ("lol_version",)),
+        # Both skin checks reset DOWNLOAD_DIR, so they run one after the other.
+        ("skin_repo_commit_changed", lambda r: check_repo_commit(r["repo_commit"]),
+         ("repo_commit", "lol_version_changed")),
+        ("manager_updated", lambda r: update_manager(r["manager_release"]),
+         ("manager_release", "skin_repo_commit_changed")),
+    ])
 
-    return results
+    repo_refresh = stages.get("skin_repo_commit_changed")
+    return {
+        'manager_updated': bool(stages.get('manager_updated')),
+        'lol_version_changed': bool(stages.get('lol_version_changed')),
+        'skin_repo_commit_changed': repo_refresh == REPO_RESET,
+        'skin_repo_patched': repo_refresh == REPO_PATCHED,
+    }
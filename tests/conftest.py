@@ -0,0 +1,14 @@
+import os
+import sys
+import shutil
+import tempfile
+
+# Point every data path at a scratch folder before any module reads config.
+DATA_DIR = tempfile.mkdtemp(prefix="lsm-tests-")
+os.environ["LEAGUESKINMANAGERVN_DATA_DIR"] = DATA_DIR
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+def pytest_sessionfinish(session, exitstatus):
+    from logger import stop_logging
+    stop_logging()
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
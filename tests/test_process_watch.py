@@ -0,0 +1,82 @@
+import time
+import pytest
+import process_watch
+from process_watch import ProcessWatcher, FakeBackend, START, STOP
+
+CLIENT = "LeagueClient.exe"
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+class FailingBackend(FakeBackend):
+    def wait_events(self, timeout):
+        raise OSError("backend broke")
+
+class BrokenSnapshotBackend(FakeBackend):
+    def snapshot(self):
+        raise OSError("cannot connect")
+
+def test_start_and_stop_events():
+    backend = FakeBackend(running={10: "leagueclient.exe"})
+    watcher = ProcessWatcher([CLIENT], backend)
+    events = []
+    watcher.subscribe(events.append)
+    watcher.start()
+    try:
+        assert watcher.pids(CLIENT) == {10}
+        backend.start(CLIENT, 11)
+        wait_for(lambda: watcher.pids(CLIENT) == {10, 11})
+        backend.stop(10)
+        wait_for(lambda: watcher.pids(CLIENT) == {11})
+        assert [(e.kind, e.pid) for e in events] == [(START, 10), (START, 11), (STOP, 10)]
+        assert not watcher.is_running("cslol-manager.exe")
+    finally:
+        watcher.stop()
+
+def _fallback_to(monkeypatch, running):
+    replacement = FakeBackend(running=running)
+
+    class Scanner(FakeBackend):
+        def __new__(cls, names):
+            return replacement
+
+    monkeypatch.setattr(process_watch, "PsutilBackend", Scanner)
+    monkeypatch.setattr(process_watch, "BACKEND_RETRY_INTERVAL", 0.01)
+    return replacement
+
+def test_falls_back_after_repeated_backend_errors(monkeypatch):
+    replacement = _fallback_to(monkeypatch, {10: "leagueclient.exe", 12: "leagueclient.exe"})
+    watcher = ProcessWatcher([CLIENT], FailingBackend(running={10: "leagueclient.exe", 11: "leagueclient.exe"}))
+    events = []
+    watcher.subscribe(events.append)
+    watcher.start()
+    try:
+        wait_for(lambda: watcher._backend is replacement)
+        # The fresh snapshot replaces what the failed backend reported.
+        wait_for(lambda: watcher.pids(CLIENT) == {10, 12})
+        assert (STOP, 11) in [(e.kind, e.pid) for e in events]
+        replacement.start(CLIENT, 13)
+        wait_for(lambda: watcher.pids(CLIENT) == {10, 12, 13})
+    finally:
+        watcher.stop()
+
+def test_falls_back_when_initial_snapshot_fails(monkeypatch):
+    replacement = _fallback_to(monkeypatch, {20: "leagueclient.exe"})
+    watcher = ProcessWatcher([CLIENT], BrokenSnapshotBackend())
+    watcher.start()
+    try:
+        assert watcher._backend is replacement
+        assert watcher.pids(CLIENT) == {20}
+    finally:
+        watcher.stop()
+
+def test_scan_backend_requires_listing_methods():
+    class Partial(process_watch._ScanBackend):
+        def _list_pids(self):
+            return []
+
+    with pytest.raises(TypeError):
+        Partial([CLIENT])
@@ -0,0 +1,49 @@
+import io
+import os
+import json
+import shutil
+import zipfile
+import pytest
+import skin_installer
+from config import REPO_ZIP_PATH, INSTALLED_DIR, INSTALLED_MANIFEST_FILE, INSTALL_JOURNAL_FILE, ensure_dirs
+from repo_index import build_repo_index
+from mapped_zip import close_mapped_repo
+from skin_manifest import load_manifest
+from skin_installer import sync_skins
+
+SKINS = ["Arcana Ahri", "Foxfire Ahri", "Star Guardian Ahri"]
+
+def skin_zip(name):
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, 'w', zipfile.ZIP_DEFLATED) as z:
+        z.writestr("META/info.json", json.dumps({"Name": name}))
+        z.writestr("WAD/Ahri.wad.client", name.encode() * 100)
+    return data.getvalue()
+
+@pytest.fixture
+def repo():
+    ensure_dirs()
+    with zipfile.ZipFile(REPO_ZIP_PATH, 'w') as z:
+        for name in SKINS:
+            z.writestr(f"lol-skins-main/skins/Ahri/{name}.zip", skin_zip(name))
+    yield build_repo_index(REPO_ZIP_PATH)
+    close_mapped_repo()
+    shutil.rmtree(INSTALLED_DIR, ignore_errors=True)
+    for path in (REPO_ZIP_PATH, INSTALLED_MANIFEST_FILE, INSTALL_JOURNAL_FILE):
+        if os.path.exists(path):
+            os.remove(path)
+
+def test_sync_resumes_from_journal(repo, monkeypatch):
+    # Crash after the skins were swapped in but before the manifest was written.
+    monkeypatch.setattr(skin_installer, "save_manifest", lambda skins: False)
+    assert sync_skins(["Ahri"], index=repo) == (3, 0, 0)
+    assert load_manifest() == {}
+    with open(INSTALL_JOURNAL_FILE, 'a', encoding='utf-8') as f:
+        f.write('{"skin": "torn')
+    monkeypatch.undo()
+    # Matching folders would be adopted anyway; only the journal may account for them here.
+    monkeypatch.setattr(skin_installer, "adopt_installed", lambda *args: 0)
+
+    assert sync_skins(["Ahri"], index=repo) == (0, 0, 3)
+    assert sorted(load_manifest()) == SKINS
+    assert not os.path.exists(INSTALL_JOURNAL_FILE)
@@ -0,0 +1,49 @@
+import os
+from skin_manifest import plan_sync, record_skin
+
+def entry(skin, crc=1, size=100, chroma=False):
+    return {"name": f"lol-skins-main/skins/Ahri/{skin}.zip", "skin": skin, "crc": crc, "size": size, "chroma": chroma}
+
+def installed(tmp_path, *entries):
+    skins = {}
+    for e in entries:
+        record_skin(skins, "Ahri", e)
+        os.makedirs(tmp_path / e["skin"])
+    return skins
+
+def test_added_skins_are_extracted(tmp_path):
+    index = {"Ahri": [entry("Arcana Ahri"), entry("Arcana Ahri chromas", chroma=True)]}
+    plan = plan_sync({}, index, ["Ahri"], True, str(tmp_path))
+    assert plan.jobs == [("Ahri", [entry("Arcana Ahri")])]
+    assert plan.removed == []
+    assert plan.unchanged == 0
+
+def test_unchanged_and_changed_skins(tmp_path):
+    skins = installed(tmp_path, entry("Arcana Ahri"), entry("Foxfire Ahri"))
+    index = {"Ahri": [entry("Arcana Ahri"), entry("Foxfire Ahri", crc=2)]}
+    plan = plan_sync(skins, index, ["Ahri"], True, str(tmp_path))
+    assert plan.jobs == [("Ahri", [entry("Foxfire Ahri", crc=2)])]
+    assert plan.unchanged == 1
+
+def test_removed_skins(tmp_path):
+    skins = installed(tmp_path, entry("Arcana Ahri"), entry("Foxfire Ahri"))
+    index = {"Ahri": [entry("Arcana Ahri")]}
+    plan = plan_sync(skins, index, ["Ahri"], True, str(tmp_path))
+    assert plan.jobs == []
+    assert plan.removed == ["Foxfire Ahri"]
+    assert plan.unchanged == 1
+
+def test_missing_folder_is_reinstalled(tmp_path):
+    skins = installed(tmp_path, entry("Arcana Ahri"))
+    os.rmdir(tmp_path / "Arcana Ahri")
+    plan = plan_sync(skins, {"Ahri": [entry("Arcana Ahri")]}, ["Ahri"], True, str(tmp_path))
+    assert plan.jobs == [("Ahri", [entry("Arcana Ahri")])]
+    assert plan.unchanged == 0
+
+def test_repair_and_layout_change_reinstall(tmp_path):
+    skins = installed(tmp_path, entry("Arcana Ahri"), entry("Foxfire Ahri"))
+    index = {"Ahri": [entry("Arcana Ahri"), entry("Foxfire Ahri")]}
+    plan = plan_sync(skins, index, ["Ahri"], True, str(tmp_path), repair={"Foxfire Ahri"})
+    assert plan.jobs == [("Ahri", [entry("Foxfire Ahri")])]
+    plan = plan_sync(skins, index, ["Ahri"], True, str(tmp_path), layout="archive")
+    assert [e["skin"] for e in plan.jobs[0][1]] == ["Arcana Ahri", "Foxfire Ahri"]